@@ -1,7 +1,6 @@
-import time
-
 import pigpio
 
+import lib_calibration
 import lib_para_360_servo
 
 #define GPIO for each servo to read from
@@ -14,17 +13,20 @@ gpio_r_w = 27
 
 pi = pigpio.pi()
 
-#### Calibrate servos, speed  = 0.2 and -0.2
-#choose gpio_l_w/gpio_l_r (left wheel), or gpio_r_w/gpio_r_r 
-#(right wheel) accordingly
+#### Calibrate both servos at the same time, speed = 0.2 and -0.2
+#each measurement stops as soon as the min/max duty cycles of both 
+#wheels are stable, after 120 s at the latest
 
-servo = lib_para_360_servo.write_pwm(pi = pi, gpio = gpio_r_w)
+wheels = lib_para_360_servo.calibrate_wheels(
+    pi = pi,
+    l_wheel_gpio = gpio_l_r, r_wheel_gpio = gpio_r_r,
+    servo_l_gpio = gpio_l_w, servo_r_gpio = gpio_r_w)
 
-#buffer time for initializing everything
-time.sleep(1)
-servo.set_speed(0.2)
-wheel = lib_para_360_servo.calibrate_pwm(pi = pi, gpio = gpio_r_r)
-servo.set_speed(0)
+#returns dcMin_l, dcMax_l, dcMin_r and dcMax_r and saves them for this robot
+#(identified by its hostname), lib_motion.control loads them if the same 
+#calibration store is passed
+calibration = lib_calibration.calibration_store()
+results = wheels.run(speeds = (0.2, -0.2), measurement_time = 120, calibration = calibration)
 
 #http://abyz.me.uk/rpi/pigpio/python.html#stop
-pi.stop()
\ No newline at end of file
+pi.stop()
@@ -0,0 +1,264 @@
+import asyncio
+import time
+
+#https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_soon_threadsafe
+
+def _set_result(future):
+
+    #the future might have been cancelled or timed out meanwhile
+    if not future.done():
+        future.set_result(None)
+
+class hcsr04:
+    """
+    asyncio interface of a :class:`lib_scanner.hcsr04` object.
+
+    This class makes measurements with the passed :class:`lib_scanner.hcsr04` object
+    without blocking the event loop. The pigpio callback function, which runs in
+    the thread of pigpio, wakes up the waiting coroutine with
+    :meth:`asyncio.loop.call_soon_threadsafe` , so several sensors and actuators
+    can be coordinated in one thread, e.g. with :func:`asyncio.gather` .
+
+    :param lib_scanner.hcsr04 sonar:
+        Sensor which makes the measurements. Its other methods must not be
+        used at the same time.
+    """
+
+    def __init__(self, sonar):
+
+        self.sonar = sonar
+
+    async def trig(self):
+        """
+        Sends the trigger signal, see :meth:`lib_scanner.hcsr04.trig` , and returns
+        a future, which is done as soon as the falling edge of the echo was received.
+
+        :return: Future of the echo.
+        :rtype: asyncio.Future
+        """
+
+        sonar = self.sonar
+        loop = asyncio.get_running_loop()
+
+        #wait for the measurement cycle without blocking the event loop
+        if sonar.trigger_time is not None:
+            remaining_time = sonar.measurement_cycle - (time.monotonic() - sonar.trigger_time)
+            if remaining_time > 0:
+                await asyncio.sleep(remaining_time)
+
+        future = loop.create_future()
+        sonar.on_echo = lambda: loop.call_soon_threadsafe(_set_result, future)
+        sonar.trig()
+
+        return future
+
+    async def read_echo(self, future, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, debug = False):
+        """
+        Waits for the echo of the last trigger signal and returns the distance,
+        see :meth:`lib_scanner.hcsr04.read_echo` .
+
+        :param asyncio.Future future:
+            Future of the echo returned by :meth:`trig` .
+        :return: Measured distance in meters, None if no valid echo was received.
+        :rtype: float
+        """
+
+        sonar = self.sonar
+        timeout = sonar.measurement_timeout(temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer)
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            #close the window, so that a late echo is rejected
+            sonar.echo_sequence = sonar.sequence
+            return None
+        finally:
+            sonar.on_echo = None
+
+        #the echo was received, so this does not block anymore
+        return sonar.read_echo(temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer, debug = debug)
+
+    async def read(self, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, max_retries = 3, debug = False):
+        """
+        Measures the distance to an object, see :meth:`lib_scanner.hcsr04.read` .
+        The same retry policy is used, see :meth:`lib_scanner.hcsr04.attempts` .
+
+        :return: Measured distance in meters, None if no valid echo was received.
+        :rtype: float
+        """
+
+        for attempt in self.sonar.attempts(max_retries = max_retries, debug = debug):
+
+            future = await self.trig()
+            distance = await self.read_echo(future, temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer, debug = debug)
+            if distance is not None:
+                return distance
+
+        return None
+
+    async def read_burst(self, n = 5, method = 'median', trim = 0.2, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, max_retries = 3, debug = False):
+        """
+        Measures the distance to an object several times and combines the measurements,
+        see :meth:`lib_scanner.hcsr04.read_burst` .
+
+        :return: Distance in meters and spread in meters, both None if no valid
+            echo was received at all.
+        :rtype: tuple
+        """
+
+        #fail before measuring
+        self.sonar.check_method(method = method)
+
+        distances = []
+        for i in range(n):
+            distance = await self.read(temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer, max_retries = max_retries, debug = debug)
+            if distance is not None:
+                distances.append(distance)
+
+        return self.sonar.combine(distances = distances, method = method, trim = trim, debug = debug)
+
+class scanner:
+    """
+    asyncio interface of a :class:`lib_scanner.scanner` object.
+
+    This class moves the servo and makes the measurements of the passed
+    :class:`lib_scanner.scanner` object without blocking the event loop,
+    see :class:`hcsr04` . All settings, e.g. ``angles`` , ``serpentine``
+    and ``burst`` , are taken from it.
+
+    :param lib_scanner.scanner scanner:
+        Scanner which makes the measurements. Its other methods must not be
+        used at the same time.
+    """
+
+    def __init__(self, scanner):
+
+        self.scanner = scanner
+        self.sonar = hcsr04(sonar = scanner.sonar)
+
+    async def move_servo(self, degree):
+        """
+        Moves the servo to a position and waits until it is reached,
+        see :meth:`lib_scanner.scanner.move_servo` .
+
+        :param int,float degree:
+            Position in degree.
+        """
+
+        wait = self.scanner.reach_time(degree = degree)
+        self.scanner.servo.set_position(degree = degree)
+        #wait for servo reaching the position
+        await asyncio.sleep(wait)
+
+    async def stream(self, rounds = 1):
+        """
+        Moves servo and yields the measurement at every defined position as soon as
+        it is made, see :meth:`lib_scanner.scanner.stream` . Use it with ``async for`` .
+
+        :param int rounds:
+            Number of rounds over all positions.
+            **Default:** 1, None for scanning until the generator is closed.
+        :return: Measurements as :class:`tuple` of angle in degree, distance in meters
+            (None if no valid echo was received) and time of the (last) trigger
+            signal (:func:`time.monotonic` ).
+        :rtype: async_generator
+        """
+
+        scanner = self.scanner
+        done = 0
+        while rounds is None or done < rounds:
+
+            angles, reset = scanner.round_angles()
+            if reset:
+                await self.move_servo(degree = 0)
+
+            for ang in angles:
+
+                await self.move_servo(degree = ang)
+                if scanner.burst > 1:
+                    distance, scanner.spreads[ang] = await self.sonar.read_burst(n = scanner.burst, method = scanner.burst_method, temp_air = scanner.temp_air, upper_limit = scanner.upper_limit, number_of_sonic_bursts = scanner.number_of_sonic_bursts, added_buffer = scanner.added_buffer, max_retries = scanner.max_retries, debug = scanner.debug)
+                else:
+                    distance = await self.sonar.read(temp_air = scanner.temp_air, upper_limit = scanner.upper_limit, number_of_sonic_bursts = scanner.number_of_sonic_bursts, added_buffer = scanner.added_buffer, max_retries = scanner.max_retries, debug = scanner.debug)
+                yield ang, distance, scanner.sonar.trigger_time
+
+            done += 1
+
+    async def read_all_angles(self):
+        """
+        Moves servo and makes measurements at every defined position,
+        see :meth:`lib_scanner.scanner.read_all_angles` .
+
+        :return: Measured distances in meters for each position defined in ``angles``,
+            None for a position where no valid echo was received.
+        :rtype: dict
+        """
+
+        measurement_dict = {ang: distance async for ang, distance, timestamp in self.stream()}
+
+        #same order as angles, regardless of the sweep direction
+        return {ang: measurement_dict[ang] for ang in self.scanner.angles}
+
+class control:
+    """
+    asyncio interface of a :class:`lib_motion.control` object.
+
+    The control loop keeps running in its own thread, see :meth:`lib_motion.control.start_move` ,
+    because writing the pulsewidths takes ~2 ms each and would block the event loop
+    and therefore the measurements. The waiting coroutine is woken up with
+    :meth:`asyncio.loop.call_soon_threadsafe` as soon as the movement is finished.
+    If the coroutine is cancelled, e.g. by :func:`asyncio.wait_for` , the movement
+    is cancelled as well.
+
+    :param lib_motion.control robot:
+        Robot which is moved.
+    """
+
+    def __init__(self, robot):
+
+        self.robot = robot
+
+    async def wait(self, handle):
+        """
+        Waits until a movement is finished.
+
+        :param lib_motion.motion_handle handle:
+            Handle of the movement.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        handle.add_done_callback(lambda handle: loop.call_soon_threadsafe(_set_result, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+        #the movement is finished, so this only raises an exception of the control loop
+        handle.wait()
+
+    async def turn(self, degree):
+        """
+        Turns the robot about x degree, see :meth:`lib_motion.control.turn` .
+
+        :param int,float degree:
+            Degree the robot has to turn.
+        """
+
+        await self.wait(self.robot.turn_async(degree))
+
+    async def straight(self, distance_in_mm):
+        """
+        Moves the robot about x mm forward or backward, see :meth:`lib_motion.control.straight` .
+
+        :param int,float distance_in_mm:
+            Distance the robot has to move.
+        """
+
+        await self.wait(self.robot.straight_async(distance_in_mm))
+
+if __name__ == '__main__':
+
+    #just continue
+    pass
@@ -0,0 +1,118 @@
+import json
+import os
+import socket
+import time
+
+class calibration_store:
+    """
+    Stores calibration values of robots in a file.
+
+    This class stores the calibration values of each robot, e.g. the ``dcMin`` /
+    ``dcMax`` values measured with :class:`lib_para_360_servo.calibrate_wheels` , in a
+    JSON file. :class:`lib_motion.control` and :class:`lib_scanner.scanner` load
+    them when they are created, so the values do not have to be copied into the
+    code and each robot of a fleet uses its own values. The values are stored per
+    robot, identified by ``robot_id`` , and named like the parameters of the
+    classes which use them:
+
+    * :class:`lib_motion.control` : ``dcMin_l`` , ``dcMax_l`` , ``dcMin_r`` , ``dcMax_r`` ,
+      ``min_pw_l`` , ``max_pw_l`` , ``min_pw_r`` and ``max_pw_r`` .
+    * :class:`lib_scanner.scanner` : ``min_pw_scanner`` , ``max_pw_scanner`` , ``servo_speed_scanner``
+      and ``servo_settle_time_scanner`` .
+
+    For each value the time it was saved is stored, so that outdated values can be
+    detected, see :meth:`load` . The file contains a format version, a file with
+    another version is not read.
+
+    :param str path:
+        Path of the file. The directory is created if needed.
+        **Default:** None, so ``~/.360pibot/calibration.json`` .
+    """
+
+    #version of the file format
+    version = 1
+
+    def __init__(self, path = None):
+
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.360pibot', 'calibration.json')
+
+        self.path = path
+
+    def _read(self):
+
+        if not os.path.exists(self.path):
+            return {'version': self.version, 'robots': {}}
+
+        with open(self.path) as f:
+            data = json.load(f)
+
+        if data.get('version') != self.version:
+            raise ValueError('{} {} {} {}'.format('unsupported version of calibration file', self.path, ':', data.get('version')))
+
+        return data
+
+    def _robot_id(self, robot_id):
+
+        #the hostname identifies the robot if no id is passed
+        return socket.gethostname() if robot_id is None else str(robot_id)
+
+    def save(self, values, robot_id = None):
+        """
+        Saves calibration values of a robot.
+
+        Values which are already stored for the robot and are not in ``values``
+        are kept.
+
+        :param dict values:
+            Names and values to save, e.g. the :class:`dict` returned by
+            :meth:`lib_para_360_servo.calibrate_wheels.run` .
+        :param str robot_id:
+            Id of the robot. **Default:** None, so the hostname.
+        """
+
+        data = self._read()
+        robot = data['robots'].setdefault(self._robot_id(robot_id), {})
+        timestamp = time.time()
+        for name, value in values.items():
+            robot[name] = {'value': value, 'timestamp': timestamp}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        #write to a temporary file first, so that the file is never left half written
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(data, f, indent = 4, sort_keys = True)
+        os.replace(temporary_path, self.path)
+
+    def load(self, robot_id = None, max_age = None):
+        """
+        Loads the calibration values of a robot.
+
+        :param str robot_id:
+            Id of the robot. **Default:** None, so the hostname.
+        :param int,float max_age:
+            Max age in seconds of the values. Older values are not returned and a
+            message is printed out, so that the robot can be calibrated again.
+            **Default:** None, so all values are returned.
+        :return: Names and values stored for the robot, empty if nothing is stored.
+        :rtype: dict
+        """
+
+        robot = self._read()['robots'].get(self._robot_id(robot_id), {})
+        now = time.time()
+        values = dict()
+        for name, entry in robot.items():
+            age = now - entry['timestamp']
+            if max_age is not None and age > max_age:
+                print('{} {} {} {} {}'.format('calibration value', name, 'is outdated, age in days:', round(age / 86400, 1), '-> not used'))
+                continue
+            values[name] = entry['value']
+
+        return values
+
+if __name__ == '__main__':
+
+    #just continue
+    pass
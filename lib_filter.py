@@ -0,0 +1,159 @@
+import bisect
+
+class median_filter:
+    """
+    Sliding median window over a stream of values.
+
+    This class calculates the median of the last ``window`` values of a stream of
+    values. The values are kept in a ring buffer and additionally in a sorted list.
+    For each new value, the oldest value is removed from the sorted list and the new
+    value is inserted at the position found with a binary search, so the list never 
+    needs to be sorted again and no new lists are created. Removing and inserting 
+    shifts the following elements of the list, so :meth:`update` needs O(``window``)
+    time, which for the small windows used here is dominated by the constant 
+    overhead of the method call. The median is then read directly from the
+    middle of the sorted list. Until ``window`` values are received, the median of
+    the values received so far is returned, the same way as :func:`statistics.median`
+    does it.
+
+    :param int window:
+        Number of values of the sliding window.
+        **Default:** 5.
+    """
+
+    def __init__(self, window = 5):
+
+        if window < 1:
+            raise ValueError('window must be at least 1')
+
+        self.window = window
+        #ring buffer in order of arrival
+        self.values = [0.0] * window
+        #the count values of the window, sorted ascending
+        self.sorted_values = []
+        self.index = 0
+        self.count = 0
+
+    def reset(self):
+        """
+        Removes all values.
+        """
+
+        self.sorted_values.clear()
+        self.index = 0
+        self.count = 0
+
+    def update(self, value):
+        """
+        Adds a new value and returns the median of the window.
+
+        :param int,float value:
+            New value.
+        :return: Median of the last ``window`` values.
+        :rtype: float
+        """
+
+        if self.count == self.window:
+            #remove the oldest value, which is overwritten in the ring buffer
+            oldest = self.values[self.index]
+            del self.sorted_values[bisect.bisect_left(self.sorted_values, oldest)]
+        else:
+            self.count += 1
+
+        self.values[self.index] = value
+        self.index += 1
+        if self.index == self.window:
+            self.index = 0
+        bisect.insort(self.sorted_values, value)
+
+        return self.median()
+
+    def median(self):
+        """
+        Returns the median of the window.
+
+        :return: Median of the last ``window`` values, or None if no value was added.
+        :rtype: float
+        """
+
+        count = self.count
+        if count == 0:
+            return None
+
+        middle = count // 2
+        if count % 2:
+            return self.sorted_values[middle]
+
+        return (self.sorted_values[middle - 1] + self.sorted_values[middle]) / 2
+
+class hampel_filter(median_filter):
+    """
+    Sliding Hampel filter over a stream of values.
+
+    This class replaces outliers in a stream of values with the median of the last
+    ``window`` values (see :class:`median_filter` ). A value is an outlier if it
+    differs from the median by more than ``n_sigmas`` times the estimated standard
+    deviation, which is 1.4826 times the median absolute deviation (MAD) of the window.
+    Values which are no outliers are passed through unchanged, so in contrast to
+    the median, the filter does not delay changes of the values.
+    The absolute deviations of the sorted values grow from the median outwards on 
+    both sides, so the MAD is found by merging both sides from the median on until 
+    the middle deviation is reached, without sorting. So :meth:`update` needs 
+    O(``window``) time, the same as :meth:`median_filter.update` .
+
+    :param int window:
+        Number of values of the sliding window.
+        **Default:** 5.
+    :param int,float n_sigmas:
+        Number of standard deviations a value must differ from the median to be
+        an outlier.
+        **Default:** 3.
+    """
+
+    def __init__(self, window = 5, n_sigmas = 3):
+
+        median_filter.__init__(self, window = window)
+        self.n_sigmas = n_sigmas
+
+    def update(self, value):
+        """
+        Adds a new value and returns it, or the median of the window if it is an outlier.
+
+        :param int,float value:
+            New value.
+        :return: Filtered value.
+        :rtype: float
+        """
+
+        median = median_filter.update(self, value)
+
+        sorted_values = self.sorted_values
+        count = self.count
+        #left starts at the last value below or at the median, right at the first above,
+        #each step takes the smaller deviation of both sides
+        left = bisect.bisect_right(sorted_values, median) - 1
+        right = left + 1
+        middle = count // 2
+        deviation = 0.0
+        for i in range(middle + 1):
+            previous_deviation = deviation
+            if right >= count or (left >= 0 and median - sorted_values[left] <= sorted_values[right] - median):
+                deviation = median - sorted_values[left]
+                left -= 1
+            else:
+                deviation = sorted_values[right] - median
+                right += 1
+        if count % 2:
+            mad = deviation
+        else:
+            mad = (previous_deviation + deviation) / 2
+
+        if abs(value - median) > self.n_sigmas * 1.4826 * mad:
+            return median
+
+        return value
+
+if __name__ == '__main__':
+
+    #just continue
+    pass
@@ -1,10 +1,584 @@
+import array
+import collections
 import math
-import statistics
+import threading
 import time
 
 import pigpio
 
+import lib_filter
 import lib_para_360_servo
+import lib_realtime
+
+class loop_stats:
+    """
+    Timing statistics of the control loop in :meth:`control.move` .
+
+    This class records for each iteration of the control loop the compute time (time 
+    from the beginning of the iteration until the pause for the sampling time starts),
+    the actual period (time between the beginning of two iterations), the jitter 
+    (actual period minus ``sampling_time`` ) and the number of missed deadlines (sampling 
+    periods which were skipped, because the iteration took too long). The compute times 
+    and periods are counted in histograms with a fixed number of bins, so the memory 
+    needed does not grow with the number of iterations.
+
+    :param float sampling_time:
+        Sampling time of the control loop in seconds.
+    :param int number_of_bins:
+        Number of bins of each histogram. The bins cover the range from 0 to two 
+        times ``sampling_time`` , values above are counted in the last bin.
+        **Default:** 100.
+    """
+
+    def __init__(self, sampling_time, number_of_bins = 100):
+
+        self.sampling_time = sampling_time
+        self.number_of_bins = number_of_bins
+        self.bin_width = 2 * sampling_time / number_of_bins
+        #preallocated histograms, see https://docs.python.org/3/library/array.html
+        self.compute_histogram = array.array('L', [0]) * number_of_bins
+        self.period_histogram = array.array('L', [0]) * number_of_bins
+        self.iterations = 0
+        self.missed_deadlines = 0
+        self.overruns = 0
+        self.compute_time_sum = 0.0
+        self.compute_time_max = 0.0
+        self.period_min = None
+        self.period_max = 0.0
+        self.jitter_max = 0.0
+        self.jitter_square_sum = 0.0
+        self.number_of_periods = 0
+
+    def _bin(self, value):
+
+        return min(int(value / self.bin_width), self.number_of_bins - 1)
+
+    def record(self, compute_time, period = None):
+        """
+        Records the timing of one iteration.
+
+        :param float compute_time:
+            Compute time of the iteration in seconds.
+        :param float period:
+            Time in seconds since the beginning of the previous iteration. 
+            **Default:** None, for the first iteration.
+        """
+
+        self.iterations += 1
+        self.compute_time_sum += compute_time
+        if compute_time > self.compute_time_max:
+            self.compute_time_max = compute_time
+        if compute_time > self.sampling_time:
+            self.overruns += 1
+        self.compute_histogram[self._bin(compute_time)] += 1
+
+        if period is None:
+            return
+
+        self.number_of_periods += 1
+        self.period_histogram[self._bin(period)] += 1
+        if self.period_min is None or period < self.period_min:
+            self.period_min = period
+        if period > self.period_max:
+            self.period_max = period
+        jitter = period - self.sampling_time
+        self.jitter_square_sum += jitter * jitter
+        if abs(jitter) > self.jitter_max:
+            self.jitter_max = abs(jitter)
+        #every skipped sampling period is a missed deadline
+        #(a half period is subtracted to not count normal jitter)
+        self.missed_deadlines += max(int((period - self.sampling_time / 2) / self.sampling_time), 0)
+
+    def _percentile(self, histogram, total, percent):
+
+        if total == 0:
+            return None
+        #upper edge of the bin in which the percentile lies
+        limit = total * percent / 100
+        count = 0
+        for index, value in enumerate(histogram):
+            count += value
+            if count >= limit:
+                return (index + 1) * self.bin_width
+
+        return self.number_of_bins * self.bin_width
+
+    def compute_time_percentile(self, percent):
+        """
+        Returns the compute time in seconds which ``percent`` of the iterations did not exceed,
+        with the resolution of the histogram.
+        """
+
+        return self._percentile(self.compute_histogram, self.iterations, percent)
+
+    def period_percentile(self, percent):
+        """
+        Returns the period in seconds which ``percent`` of the iterations did not exceed,
+        with the resolution of the histogram.
+        """
+
+        return self._percentile(self.period_histogram, self.number_of_periods, percent)
+
+    def compute_time_mean(self):
+
+        return self.compute_time_sum / self.iterations if self.iterations else None
+
+    def jitter_rms(self):
+
+        return math.sqrt(self.jitter_square_sum / self.number_of_periods) if self.number_of_periods else None
+
+    def __str__(self):
+
+        if not self.iterations:
+            return 'no iterations recorded'
+
+        return '{} {}, {} {:.6f}/{:.6f} s, {} {}, {} {}, {} {} s, {} {} s'.format(
+            'iterations:', self.iterations,
+            'compute time mean/max:', self.compute_time_mean(), self.compute_time_max,
+            'overruns:', self.overruns,
+            'missed deadlines:', self.missed_deadlines,
+            'jitter rms:', None if self.jitter_rms() is None else round(self.jitter_rms(), 6),
+            'jitter max:', round(self.jitter_max, 6))
+
+class motion_profile:
+    """
+    Velocity profile of a movement from rest to rest.
+
+    This class calculates time-parameterized position and velocity set-points for
+    moving ``distance`` ticks, so that the wheels do not have to follow a jump of
+    the set-point, see method :meth:`control.move` . Without ``max_jerk`` the profile
+    is trapezoidal: constant acceleration with ``max_acceleration`` up to
+    ``max_velocity`` , constant velocity and constant deceleration to rest. With
+    ``max_jerk`` the acceleration itself changes linearly (S-curve), so the
+    acceleration has no jumps. If the distance is too short to reach
+    ``max_velocity`` , the highest reachable velocity is used.
+
+    :param int,float distance:
+        Distance in ticks, negative for moving backward.
+    :param int,float max_velocity:
+        Max velocity in ticks/s.
+    :param int,float max_acceleration:
+        Max acceleration in ticks/s².
+    :param int,float max_jerk:
+        Max jerk in ticks/s³.
+        **Default:** None, so a trapezoidal profile.
+    """
+
+    def __init__(self, distance, max_velocity, max_acceleration, max_jerk = None):
+
+        if max_velocity <= 0 or max_acceleration <= 0 or (max_jerk is not None and max_jerk <= 0):
+            raise ValueError('max_velocity, max_acceleration and max_jerk must be positive')
+
+        self.distance = distance
+        self.direction = 1 if distance >= 0 else -1
+        self.max_acceleration = max_acceleration
+        self.max_jerk = max_jerk
+
+        length = abs(distance)
+        velocity = max_velocity
+        if 2 * self._acceleration_distance(velocity) > length:
+            #max_velocity is not reached, find the highest reachable velocity by bisection
+            low = 0.0
+            high = max_velocity
+            for i in range(60):
+                velocity = (low + high) / 2
+                if 2 * self._acceleration_distance(velocity) > length:
+                    high = velocity
+                else:
+                    low = velocity
+            velocity = low
+
+        self.velocity = velocity
+        self.acceleration_time, self.jerk_time, self.peak_acceleration = self._acceleration_phase(velocity)
+        self.acceleration_distance = self._acceleration_distance(velocity)
+        self.cruise_time = (length - 2 * self.acceleration_distance) / velocity if velocity > 0 else 0.0
+        #total time of the movement in seconds
+        self.duration = 2 * self.acceleration_time + self.cruise_time
+
+    def _acceleration_phase(self, velocity):
+
+        #time of the acceleration phase, time of each jerk segment and peak acceleration
+        if self.max_jerk is None:
+            return velocity / self.max_acceleration, 0.0, self.max_acceleration
+        if velocity * self.max_jerk >= self.max_acceleration ** 2:
+            jerk_time = self.max_acceleration / self.max_jerk
+            return velocity / self.max_acceleration + jerk_time, jerk_time, self.max_acceleration
+        #max_acceleration is not reached
+        jerk_time = (velocity / self.max_jerk) ** 0.5
+        return 2 * jerk_time, jerk_time, self.max_jerk * jerk_time
+
+    def _acceleration_distance(self, velocity):
+
+        #the acceleration phase is point symmetric, so the mean velocity is velocity/2
+        return velocity * self._acceleration_phase(velocity)[0] / 2
+
+    def _accelerate(self, t):
+
+        #position and velocity at time t of the acceleration phase
+        jerk_time = self.jerk_time
+        peak_acceleration = self.peak_acceleration
+        acceleration_time = self.acceleration_time
+        if t <= 0:
+            return 0.0, 0.0
+        if t >= acceleration_time:
+            return self.acceleration_distance, self.velocity
+        if t < jerk_time:
+            return self.max_jerk * t ** 3 / 6, self.max_jerk * t ** 2 / 2
+        if t <= acceleration_time - jerk_time:
+            velocity_0 = peak_acceleration * jerk_time / 2
+            position_0 = peak_acceleration * jerk_time ** 2 / 6
+            dt = t - jerk_time
+            return position_0 + velocity_0 * dt + peak_acceleration * dt ** 2 / 2, velocity_0 + peak_acceleration * dt
+        #last jerk segment, point symmetric to the first one
+        dt = acceleration_time - t
+        return self.acceleration_distance - self.velocity * dt + self.max_jerk * dt ** 3 / 6, self.velocity - self.max_jerk * dt ** 2 / 2
+
+    def sample(self, t):
+        """
+        Returns the set-points at a point in time.
+
+        :param float t:
+            Time in seconds since the start of the movement.
+        :return: Position in ticks (relative to the start) and velocity in ticks/s.
+        :rtype: tuple
+        """
+
+        if t >= self.duration:
+            return self.distance, 0.0
+
+        if t <= self.acceleration_time:
+            position, velocity = self._accelerate(t)
+        elif t <= self.acceleration_time + self.cruise_time:
+            position = self.acceleration_distance + self.velocity * (t - self.acceleration_time)
+            velocity = self.velocity
+        else:
+            #deceleration is the mirrored acceleration
+            position, velocity = self._accelerate(self.duration - t)
+            position = abs(self.distance) - position
+
+        return self.direction * position, self.direction * velocity
+
+class cascade_pid:
+    """
+    Cascade control loop of one wheel.
+
+    This class implements the cascade control loop which :meth:`control.move` runs for
+    each wheel. The outer loop is a position PID controller, its output (limited to -1 
+    and 1) is converted to ticks/s and is the set-point of the inner loop, a speed PID 
+    controller. The rotation speed is calculated from the change of the total angle and 
+    filtered with a sliding median window, see :class:`lib_filter.median_filter` . The output of the inner loop is scaled back to
+    the speed range -1 to 1 of the servo, see :meth:`lib_para_360_servo.write_pwm.set_speed` .
+    See method :meth:`control.move` for more informations about the controllers.
+
+    The two loops can run with different rates: the inner loop runs in each call of
+    :meth:`step` , the outer loop only in every ``position_divider`` th call, its 
+    output is held in between. So the speed can be regulated with a high rate, while
+    the position, which changes slower, is controlled with a lower rate.
+
+    All state is preallocated and the attributes are defined by ``__slots__`` , so that
+    :meth:`step` does not allocate new objects in the control loop. The first sample
+    after :meth:`reset` is used to warm up the controller, as no rotation speed can be 
+    calculated from one sample.
+
+    :param float sampling_time:
+        Sampling time of the inner PID controller in seconds, so time between two 
+        calls of :meth:`step` .
+    :param int,float Kp_p:
+        Kp value of the outer PID controller.
+    :param int,float Ki_p:
+        Ki value of the outer PID controller.
+    :param int,float Kd_p:
+        Kd value of the outer PID controller.
+    :param int,float Kp_s:
+        Kp value of the inner PID controller.
+    :param int,float Ki_s:
+        Ki value of the inner PID controller.
+    :param int,float Kd_s:
+        Kd value of the inner PID controller.
+    :param int,float max_ticks:
+        Full speed of a wheel forward and backward in ticks/s.
+        **Default:** 650.
+    :param int,float deadband:
+        Position errors between -``deadband`` and ``deadband`` ticks are set to 0.
+        **Default:** 2.
+    :param int window:
+        Number of values of the sliding median window of the rotation speed.
+        **Default:** 5.
+    :param int position_divider:
+        The outer PID controller runs in every ``position_divider`` th step, so 
+        with a sampling time of ``sampling_time`` * ``position_divider`` .
+        **Default:** 1, so both controllers run with the same rate.
+    """
+
+    __slots__ = (
+        'sampling_time', 'Kp_p', 'Ki_p', 'Kd_p', 'Kp_s', 'Ki_s', 'Kd_s',
+        'max_ticks', 'deadband', 'limit_p', 'limit_s',
+        'position_divider', 'position_sampling_time', 'counter', 'output_p_con', 'feedforward',
+        'ticks_filter',
+        'target_angle', 'prev_total_angle', 'prev_tick', 'warm',
+        'sum_error_p', 'sum_error_s', 'error_p', 'error_p_old', 'error_s_old', 'ticks')
+
+    def __init__(
+        self, sampling_time, Kp_p, Ki_p, Kd_p, Kp_s, Ki_s, Kd_s,
+        max_ticks = 650, deadband = 2, window = 5, position_divider = 1):
+
+        if position_divider < 1:
+            raise ValueError('position_divider must be at least 1')
+
+        self.sampling_time = sampling_time
+        self.position_divider = position_divider
+        self.position_sampling_time = sampling_time * position_divider
+        self.Kp_p = Kp_p
+        self.Ki_p = Ki_p
+        self.Kd_p = Kd_p
+        self.Kp_s = Kp_s
+        self.Ki_s = Ki_s
+        self.Kd_s = Kd_s
+        self.max_ticks = max_ticks
+        self.deadband = deadband
+        #limits of the I-Parts, None if Ki is zero
+        self.limit_p = 1/Ki_p if Ki_p else None
+        self.limit_s = max_ticks/Ki_s if Ki_s else None
+        self.ticks_filter = lib_filter.median_filter(window = window)
+        self.reset(target_angle = 0)
+
+    def reset(self, target_angle):
+        """
+        Resets the controller for a new movement.
+
+        :param int,float target_angle:
+            Set-point (position) as total angle in ticks.
+        """
+
+        self.target_angle = target_angle
+        self.prev_total_angle = 0.0
+        self.prev_tick = None
+        self.warm = False
+        self.counter = 0
+        self.output_p_con = 0.0
+        self.feedforward = 0.0
+        self.ticks_filter.reset()
+        self.sum_error_p = 0.0
+        self.sum_error_s = 0.0
+        self.error_p = None
+        self.error_p_old = 0.0
+        self.error_s_old = 0.0
+        self.ticks = 0.0
+
+    def set_target(self, target_angle, feedforward = 0.0):
+        """
+        Changes the set-point (position) during a movement, e.g. to follow a :class:`motion_profile` .
+
+        :param int,float target_angle:
+            Set-point (position) as total angle in ticks.
+        :param int,float feedforward:
+            Speed in ticks/s which is added to the output of the outer loop, e.g. the 
+            velocity of the profile, so that the outer loop only has to correct the 
+            remaining error.
+            **Default:** 0.
+        """
+
+        self.target_angle = target_angle
+        self.feedforward = feedforward
+
+    def step(self, total_angle, tick = None):
+        """
+        Calculates one step of the cascade control loop.
+
+        The rotation speed is calculated out of the change of ``total_angle`` 
+        divided by the time between the falling edges of the feedback signal, 
+        which the two angles were measured from, if ``tick`` is passed. So 
+        jitter of the control loop does not affect the speed. Otherwise it is 
+        divided by ``sampling_time`` . If no new angle was measured since the 
+        last step, the speed is not updated.
+
+        :param int,float total_angle:
+            Measured total angle of the wheel in ticks.
+        :param int tick:
+            pigpio tick (µs) of the falling edge of the feedback signal, which 
+            ``total_angle`` was measured from, see :meth:`lib_para_360_servo.read_pwm.read_with_tick` .
+            **Default:** None, so ``sampling_time`` is used.
+        :return: Speed between -1 and 1 which has to be set, or None for the
+            first sample after :meth:`reset` , which warms up the controller.
+        :rtype: float
+        """
+
+        if not self.warm:
+            self.prev_total_angle = total_angle
+            self.prev_tick = tick
+            self.warm = True
+            return None
+
+        #the outer loop runs only in every position_divider th step
+        if self.counter == 0:
+
+            ## Position Control
+            #Er = SP - PV
+            error_p = self.target_angle - total_angle
+            #Deadband-Filter to remove ocillating forwards and backwards after reaching set-point
+            if error_p <= self.deadband and error_p >= -self.deadband:
+                error_p = 0
+            #I-Part
+            self.sum_error_p += error_p
+            #limit I-Part to -1 and 1
+            if self.limit_p is not None:
+                self.sum_error_p = max(min(self.limit_p, self.sum_error_p), -self.limit_p)
+
+            #PID-Controller
+            output_p = self.Kp_p * error_p + self.Ki_p * self.position_sampling_time * self.sum_error_p + self.Kd_p / self.position_sampling_time * (error_p - self.error_p_old)
+            #limit output of position control to speed range
+            output_p = max(min(1, output_p), -1)
+
+            self.error_p_old = error_p
+            self.error_p = error_p
+
+            #convert range output_p from -1 to 1 to ticks/s and add the feedforward,
+            #limited to the speed range
+            self.output_p_con = max(min(self.max_ticks, self.max_ticks * output_p + self.feedforward), -self.max_ticks)
+
+        self.counter += 1
+        if self.counter == self.position_divider:
+            self.counter = 0
+
+        ## Speed Control
+        output_p_con = self.output_p_con
+        #ticks per second (ticks/s), calculated from a moving median window
+        if tick is None or self.prev_tick is None:
+            self.ticks = self.ticks_filter.update((total_angle - self.prev_total_angle) / self.sampling_time)
+        else:
+            #time between the edges in seconds, tickDiff handles the wrap around
+            edge_time = pigpio.tickDiff(t1=self.prev_tick, t2=tick) / 1000000
+            if edge_time > 0:
+                self.ticks = self.ticks_filter.update((total_angle - self.prev_total_angle) / edge_time)
+        self.prev_total_angle = total_angle
+        self.prev_tick = tick
+
+        #Er = SP - PV
+        error_s = output_p_con - self.ticks
+        #I-Part
+        self.sum_error_s += error_s
+        #limit I-Part to -1 and 1
+        if self.limit_s is not None:
+            self.sum_error_s = max(min(self.limit_s, self.sum_error_s), -self.limit_s)
+
+        #PID-Controller
+        output_s = self.Kp_s * error_s + self.Ki_s * self.sampling_time * self.sum_error_s + self.Kd_s / self.sampling_time * (error_s - self.error_s_old)
+
+        self.error_s_old = error_s
+
+        #convert range output_s fom ticks/s to -1 to 1, the feedforward is also added
+        #to the output, as the servo sets the speed itself
+        return (output_s + self.feedforward) / self.max_ticks
+
+class motion_handle:
+    """
+    Handle of a movement running in a background thread.
+
+    An object of this class is returned by :meth:`control.straight_async` and
+    :meth:`control.turn_async` . It allows following the progress of the movement,
+    cancelling it and waiting until it is finished, while the calling thread e.g.
+    makes measurements with :ref:`lib_scanner` .
+
+    :param int,float number_ticks:
+        Number of ticks the wheels have to move.
+    """
+
+    def __init__(self, number_ticks):
+
+        self.number_ticks = number_ticks
+        #mean remaining ticks of both wheels, updated by the control loop
+        self.remaining_ticks = abs(number_ticks)
+        self.cancel_requested = threading.Event()
+        self.finished = threading.Event()
+        #exception raised in the control loop, raised again by wait()
+        self.exception = None
+        self.thread = None
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def progress(self):
+        """
+        Returns the progress of the movement.
+
+        :return: Share of the ticks already moved, between 0 and 1. 1 as soon
+            as the set-point (position) is reached, even if the movement is not
+            finished yet, see :meth:`control.move` .
+        :rtype: float
+        """
+
+        if self.number_ticks == 0:
+            return 1.0
+
+        return max(min(1 - self.remaining_ticks / abs(self.number_ticks), 1.0), 0.0)
+
+    def cancel(self):
+        """
+        Stops the movement. The wheels are stopped at the current position.
+        """
+
+        self.cancel_requested.set()
+
+    def cancelled(self):
+        """
+        Returns True if the movement was cancelled with :meth:`cancel` .
+        """
+
+        return self.cancel_requested.is_set()
+
+    def done(self):
+        """
+        Returns True if the movement is finished or cancelled.
+        """
+
+        return self.finished.is_set()
+
+    def add_done_callback(self, func):
+        """
+        Adds a function which is called when the movement is finished or cancelled.
+
+        The function is called with the handle as argument in the thread of the 
+        control loop, or immediately if the movement is already finished.
+
+        :param func:
+            Function to call.
+        """
+
+        with self.lock:
+            if not self.finished.is_set():
+                self.callbacks.append(func)
+                return
+
+        func(self)
+
+    def finish(self):
+
+        #marks the movement as finished and calls the added functions
+        with self.lock:
+            self.finished.set()
+            callbacks = self.callbacks
+            self.callbacks = []
+
+        for func in callbacks:
+            func(self)
+
+    def wait(self, timeout = None):
+        """
+        Waits until the movement is finished or cancelled.
+
+        If the control loop raised an exception, it is raised again.
+
+        :param int,float timeout:
+            Max time in seconds to wait.
+            **Default:** None, so without timeout.
+        :return: True if the movement is finished, False if the timeout was reached.
+        :rtype: bool
+        """
+
+        finished = self.finished.wait(timeout)
+        if finished and self.exception is not None:
+            raise self.exception
+
+        return finished
 
 class control:
     """
@@ -92,7 +666,9 @@ class control:
         the speed range is also scaled between -1 and 1 as the output of 
         the inner control loop. 
     :param float sampling_time:
-        Sampling time of the four PID controllers in seconds.
+        Sampling time of the control loop in seconds. Each wheel is controlled by a 
+        :class:`cascade_pid` , whose inner loop (speed) runs every ``sampling_time`` 
+        and whose outer loop (position) every ``position_divider`` th ``sampling_time`` .
         **Default:** 0.01.
         1. PWM of motor feedback is 910Hz (0,001098901 s), so position changes cannot 
         be recognized faster than 1.1 ms. Therefore, it is not needed to run the outer control 
@@ -103,6 +679,15 @@ class control:
         (0,002 seconds vs 0,000005 seconds; runtime with vs without writing pulsewidth).
         3. For recognizing the RPMs of the wheels 10ms is needed to have enough changes in the
         position. This was found out by testing. See method :meth:`move` for more informations.
+    :param int position_divider:
+        The outer PID controllers (position) run only in every ``position_divider`` th
+        iteration of the control loop, the inner PID controllers (speed) in every 
+        iteration, see :class:`cascade_pid` . So the speed can be regulated with a 
+        higher rate by decreasing ``sampling_time`` , while the rate of the position
+        control stays the same, e.g. ``sampling_time`` = 0.005 and ``position_divider`` = 2.
+        The inner loop can not be driven by the edges of the feedback signal 
+        (910 Hz), as writing the pulsewidths takes ~2 ms, see ``sampling_time`` .
+        **Default:** 1, so all PID controllers run with ``sampling_time`` .
     :param int,float Kp_p:
         Kp value of the outer PID controllers, see method :meth:`move` 
         for more informations.
@@ -127,6 +712,88 @@ class control:
         Kd value of the inner PID controllers, see method :meth:`move` 
         for more informations.
         **Default:** 0.
+    :param bool raw_ticks:
+        If True, the two :class:`lib_para_360_servo.read_pwm` instances only store the
+        high time of the feedback signals in their callback functions and the duty cycle
+        is calculated in :meth:`get_angle_l` / :meth:`get_angle_r` .
+        **Default:** False.
+    :param int median_window:
+        Number of values of the sliding median window, which filters the rotation
+        speed measurement of each wheel, see method :meth:`move` .
+        **Default:** 5.
+    :param bool edge_timing:
+        If True, the rotation speed is calculated with the time between the 
+        falling edges of the feedback signals the angles were measured from, 
+        otherwise with ``sampling_time`` , see :meth:`cascade_pid.step` .
+        **Default:** True.
+    :param int,float settle_band:
+        Max position error in ticks of each wheel, at which the set-point (position)
+        counts as reached, see method :meth:`move` .
+        **Default:** 2, the deadband of the outer PID controllers.
+    :param int,float settle_speed:
+        Max mean rotation speed in ticks/s of each wheel over ``settle_time`` , at 
+        which the wheel counts as at rest, see method :meth:`move` .
+        **Default:** 20, so 2 ticks in 0.1 s. A measured angle is only exact to 
+        about one tick, which makes a wheel at rest seem to move up to 2 ticks.
+    :param int,float settle_time:
+        Time in seconds both wheels must be at rest at their set-point before the 
+        movement is finished, see method :meth:`move` .
+        **Default:** 0.1.
+    :param int,float max_settle_time:
+        Max time in seconds both wheels may stay within ``settle_band`` without being 
+        at rest. After it the movement is finished anyway, still within ``settle_band`` , 
+        and the attribute ``settled`` is False, see method :meth:`move` .
+        **Default:** 1.
+    :param int,float max_move_time:
+        Max time in seconds of a movement. After it the wheels are stopped and a 
+        :class:`RuntimeError` is raised, see method :meth:`move` .
+        **Default:** None, so without limit.
+    :param int,float max_velocity:
+        If set, the set-points (positions) of the wheels follow a velocity profile with 
+        this max velocity in ticks/s instead of jumping to the target, see :class:`motion_profile` 
+        and method :meth:`move` . It should be clearly below the full speed of 650 ticks/s, 
+        so that the controllers are able to correct errors.
+        **Default:** None, so no velocity profile is used.
+    :param int,float max_acceleration:
+        Max acceleration of the velocity profile in ticks/s².
+        **Default:** 1500.
+    :param int,float max_jerk:
+        Max jerk of the velocity profile in ticks/s³, see :class:`motion_profile` .
+        **Default:** None, so a trapezoidal profile.
+    :param int,float feedforward:
+        Factor of the velocity of the profile, which is added to the output of the 
+        outer PID controllers, see :meth:`cascade_pid.set_target` . 0 switches it off.
+        **Default:** 1.
+    :param bool realtime:
+        If True, each movement runs in a dedicated thread, also if it is started
+        with :meth:`straight` or :meth:`turn` , which is configured as real-time 
+        thread with :func:`lib_realtime.configure_thread` , so that the jitter of 
+        the control loop stays bounded if the Raspberry Pi is under load. The memory 
+        is locked and settings which are not permitted are reported only for the first 
+        movement, the names of the applied settings are stored in the attribute 
+        ``realtime_applied`` .
+        **Default:** False.
+    :param int realtime_priority:
+        SCHED_FIFO priority of the thread, see :func:`lib_realtime.configure_thread` .
+        **Default:** 50.
+    :param set realtime_cpus:
+        Numbers of the CPUs the thread may run on, see :func:`lib_realtime.configure_thread` .
+        **Default:** None, so all CPUs.
+    :param bool loop_stats:
+        If True, the timing of each iteration of the control loop is recorded
+        and after each movement available as :class:`loop_stats` object in the 
+        attribute ``stats`` , see method :meth:`move` .
+        **Default:** False, so nothing is recorded.
+    :param lib_calibration.calibration_store calibration:
+        If set, the values ``dcMin_l`` , ``dcMax_l`` , ``dcMin_r`` , ``dcMax_r`` , 
+        ``min_pw_l`` , ``max_pw_l`` , ``min_pw_r`` and ``max_pw_r`` stored for the robot 
+        are loaded and replace the passed values, see :class:`lib_calibration.calibration_store` .
+        **Default:** None, so the passed values are used.
+    :param str robot_id:
+        Id of the robot in ``calibration`` . **Default:** None, so the hostname.
+    :param int,float max_calibration_age:
+        Max age in seconds of the values in ``calibration`` , older values are not used.
+        **Default:** None, so the values are used regardless of their age.
 
     .. _`360_data_sheet`: https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
     .. _`wheel_robot`: https://www.parallax.com/product/28114
@@ -141,12 +808,33 @@ class control:
         servo_l_gpio = 17, min_pw_l = 1280, max_pw_l = 1720, min_speed_l = -1, max_speed_l = 1,
         servo_r_gpio = 27, min_pw_r = 1280, max_pw_r = 1720, min_speed_r = -1, max_speed_r = 1,
         sampling_time = 0.01,
+        position_divider = 1,
         Kp_p = 0.1, #not too big values, otherwise output of position control would slow down too abrupt
         Ki_p = 0.1,
         Kd_p = 0,
         Kp_s = 0.5,
         Ki_s = 0,
-        Kd_s = 0):
+        Kd_s = 0,
+        raw_ticks = False,
+        median_window = 5,
+        edge_timing = True,
+        settle_band = 2, settle_speed = 20, settle_time = 0.1, max_settle_time = 1, max_move_time = None,
+        max_velocity = None, max_acceleration = 1500, max_jerk = None, feedforward = 1,
+        realtime = False, realtime_priority = 50, realtime_cpus = None,
+        loop_stats = False,
+        calibration = None, robot_id = None, max_calibration_age = None):
+
+        #stored calibration values replace the passed ones
+        if calibration is not None:
+            stored = calibration.load(robot_id = robot_id, max_age = max_calibration_age)
+            dcMin_l = stored.get('dcMin_l', dcMin_l)
+            dcMax_l = stored.get('dcMax_l', dcMax_l)
+            dcMin_r = stored.get('dcMin_r', dcMin_r)
+            dcMax_r = stored.get('dcMax_r', dcMax_r)
+            min_pw_l = stored.get('min_pw_l', min_pw_l)
+            max_pw_l = stored.get('max_pw_l', max_pw_l)
+            min_pw_r = stored.get('min_pw_r', min_pw_r)
+            max_pw_r = stored.get('max_pw_r', max_pw_r)
         
         self.pi = pi
         self.width_robot = width_robot
@@ -157,15 +845,42 @@ class control:
         self.dcMin_r = dcMin_r
         self.dcMax_r = dcMax_r
         self.sampling_time = sampling_time
+        self.position_divider = position_divider
         self.Kp_p = Kp_p
         self.Ki_p = Ki_p
         self.Kd_p = Kd_p
         self.Kp_s = Kp_s
         self.Ki_s = Ki_s
         self.Kd_s = Kd_s
-
-        self.l_wheel = lib_para_360_servo.read_pwm(pi = self.pi, gpio = l_wheel_gpio)
-        self.r_wheel = lib_para_360_servo.read_pwm(pi = self.pi, gpio = r_wheel_gpio)
+        self.median_window = median_window
+        self.edge_timing = edge_timing
+        self.settle_band = settle_band
+        self.settle_speed = settle_speed
+        self.settle_time = settle_time
+        self.max_settle_time = max_settle_time
+        self.max_move_time = max_move_time
+        #True if both wheels were at rest at the end of the last movement, False if it
+        #was finished by max_settle_time, None if it was cancelled or failed
+        self.settled = None
+        self.max_velocity = max_velocity
+        self.max_acceleration = max_acceleration
+        self.max_jerk = max_jerk
+        self.feedforward = feedforward
+        self.realtime = realtime
+        self.realtime_priority = realtime_priority
+        self.realtime_cpus = realtime_cpus
+        #settings applied by lib_realtime.configure_thread(), None until the first movement
+        self.realtime_applied = None
+        self.loop_stats = loop_stats
+        self.stats = None
+        #handle of the last movement started in the background
+        self.motion = None
+        #owner of the wheels while a movement runs, see move()
+        self.moving = None
+        self.moving_lock = threading.Lock()
+
+        self.l_wheel = lib_para_360_servo.read_pwm(pi = self.pi, gpio = l_wheel_gpio, raw_ticks = raw_ticks)
+        self.r_wheel = lib_para_360_servo.read_pwm(pi = self.pi, gpio = r_wheel_gpio, raw_ticks = raw_ticks)
         self.servo_l = lib_para_360_servo.write_pwm(pi = self.pi, gpio = servo_l_gpio, min_pw = min_pw_l, max_pw = max_pw_l, min_speed = min_speed_l, max_speed = max_speed_l)
         self.servo_r = lib_para_360_servo.write_pwm(pi = self.pi, gpio = servo_r_gpio, min_pw = min_pw_r, max_pw = max_pw_r, min_speed = min_speed_r, max_speed = max_speed_r)
 
@@ -173,20 +888,26 @@ class control:
         time.sleep(1)
 
     #angular position in units full circle
-    def get_angle_l(self):
+    def get_angle_l(self, duty_cycle = None):
+
+        if duty_cycle is None:
+            duty_cycle = self.l_wheel.read()
 
         #driving forward will increase the angle
-        angle_l = (self.unitsFC - 1) - ((self.l_wheel.read() - self.dcMin_l) * self.unitsFC) / (self.dcMax_l - self.dcMin_l + 1)
+        angle_l = (self.unitsFC - 1) - ((duty_cycle - self.dcMin_l) * self.unitsFC) / (self.dcMax_l - self.dcMin_l + 1)
 
         angle_l = max(min((self.unitsFC - 1), angle_l), 0)
 
         return angle_l
 
     #angular position in units full circle
-    def get_angle_r(self):
+    def get_angle_r(self, duty_cycle = None):
+
+        if duty_cycle is None:
+            duty_cycle = self.r_wheel.read()
 
         #driving forward will increase the angle
-        angle_r = (self.r_wheel.read() - self.dcMin_r) * self.unitsFC / (self.dcMax_r - self.dcMin_r + 1)
+        angle_r = (duty_cycle - self.dcMin_r) * self.unitsFC / (self.dcMax_r - self.dcMin_r + 1)
 
         angle_r = max(min((self.unitsFC - 1), angle_r), 0)
 
@@ -255,7 +976,9 @@ class control:
         Positive degree values turn the robot to the left,
         negative degree values to the right, see picture in :ref:`Used_local_coordinate_system` , 
         where the local coordinate system of the robot is shown. This method calls 
-        :meth:`lib_motion.control.move` which controls the movement of the robot.
+        :meth:`lib_motion.control.move` which controls the movement of the robot. 
+        A :class:`RuntimeError` is raised if a movement started with :meth:`start_move` 
+        is still running.
 
         :param int,float degree:
             Degree the robot has to turn.
@@ -263,7 +986,11 @@ class control:
 
         number_ticks = self.arc_circle(degree)/self.tick_length()
 
-        self.move(number_ticks = number_ticks, turn = True)
+        if self.realtime:
+            #run in the dedicated real-time thread
+            self.start_move(number_ticks = number_ticks, turn = True).wait()
+        else:
+            self.move(number_ticks = number_ticks, turn = True)
 
         return None
 
@@ -275,7 +1002,9 @@ class control:
         values move the robot forward (regarding the local x-axis), negative distance 
         values backward (regarding the local x-axis), see picture in :ref:`Used_local_coordinate_system` , 
         where the local coordinate system of the robot is shown. This method calls 
-        :meth:`lib_motion.control.move` which controls the movement of the robot.
+        :meth:`lib_motion.control.move` which controls the movement of the robot. 
+        A :class:`RuntimeError` is raised if a movement started with :meth:`start_move` 
+        is still running.
 
         :param int,float distance_in_mm:
             Distance the robot has to move.
@@ -283,28 +1012,165 @@ class control:
 
         number_ticks = distance_in_mm/self.tick_length()
 
-        self.move(number_ticks = number_ticks, straight = True)
+        if self.realtime:
+            #run in the dedicated real-time thread
+            self.start_move(number_ticks = number_ticks, straight = True).wait()
+        else:
+            self.move(number_ticks = number_ticks, straight = True)
 
         return None
 
+    def turn_async(self, degree):
+        """
+        Turns the robot about x degree in the background.
+
+        Same as :meth:`turn` , but the movement runs in a background thread and 
+        this method returns immediately, see :meth:`start_move` .
+
+        :param int,float degree:
+            Degree the robot has to turn.
+        :return: Handle of the movement.
+        :rtype: motion_handle
+        """
+
+        number_ticks = self.arc_circle(degree)/self.tick_length()
+
+        return self.start_move(number_ticks = number_ticks, turn = True)
+
+    def straight_async(self, distance_in_mm):
+        """
+        Moves the robot about x mm forward or backward in the background.
+
+        Same as :meth:`straight` , but the movement runs in a background thread and 
+        this method returns immediately, see :meth:`start_move` .
+
+        :param int,float distance_in_mm:
+            Distance the robot has to move.
+        :return: Handle of the movement.
+        :rtype: motion_handle
+        """
+
+        number_ticks = distance_in_mm/self.tick_length()
+
+        return self.start_move(number_ticks = number_ticks, straight = True)
+
+    def start_move(self, number_ticks = 0, straight = False, turn = False):
+        """
+        Runs :meth:`move` in a background thread.
+
+        Only one movement can run at a time. The handle of the last started 
+        movement is also available in the attribute ``motion`` . If ``realtime`` 
+        is True, the thread is configured as real-time thread.
+
+        :param int,float number_ticks:
+            Number of ticks the wheels have to move.
+        :param bool straight:
+            True or False, if robot should move straight. 
+            **Default:** False.
+        :param bool turn:
+            True or False, if robot should turn. 
+            **Default:** False.
+        :return: Handle of the movement.
+        :rtype: motion_handle
+        """
+
+        handle = motion_handle(number_ticks = number_ticks)
+        #reserved for the thread before it starts, so no other movement can start meanwhile
+        self._check_idle(handle = handle)
+        handle.thread = threading.Thread(target = self._run_move, args = (handle, number_ticks, straight, turn), daemon = True)
+        self.motion = handle
+        try:
+            handle.thread.start()
+        except Exception:
+            self._release(handle)
+            raise
+
+        return handle
+
+    def _check_idle(self, handle = None):
+
+        #both wheels are controlled by one movement at a time, checking and marking 
+        #the running movement is one step, so two threads can not both pass
+        #the movement of handle may pass, it was reserved by start_move()
+        owner = object() if handle is None else handle
+        with self.moving_lock:
+            if self.moving is not None and self.moving is not owner:
+                raise RuntimeError('another movement is still running, cancel or wait for it first')
+            self.moving = owner
+
+        return owner
+
+    def _release(self, owner):
+
+        with self.moving_lock:
+            if self.moving is owner:
+                self.moving = None
+
+    def _configure_realtime(self):
+
+        if self.realtime_applied is None:
+            self.realtime_applied = lib_realtime.configure_thread(priority = self.realtime_priority, cpus = self.realtime_cpus)
+            return
+
+        #the scheduling policy and the affinity belong to each thread, but only the 
+        #permitted ones are tried again and the memory of the process stays locked
+        lib_realtime.configure_thread(
+            priority = self.realtime_priority if 'priority' in self.realtime_applied else None,
+            cpus = self.realtime_cpus if 'cpus' in self.realtime_applied else None,
+            lock = False)
+
+    def _run_move(self, handle, number_ticks, straight, turn):
+
+        try:
+            if self.realtime:
+                self._configure_realtime()
+            self.move(number_ticks = number_ticks, straight = straight, turn = turn, handle = handle)
+        except Exception as e:
+            #stop the wheels and pass the exception to the waiting thread
+            self.set_speed_r(0.0)
+            self.set_speed_l(0.0)
+            handle.exception = e
+        finally:
+            #also if move() was not reached
+            self._release(handle)
+            handle.finish()
+
     def move(
         self,
         number_ticks = 0,
         straight = False, 
-        turn = False):
+        turn = False,
+        handle = None):
         """
         Core of motion control.
 
         This method controls the movement of the robot. It is called from :meth:`lib_motion.control.turn` 
-        or :meth:`lib_motion.control.straight` and is not ment to be called directly. Four 
+        or :meth:`lib_motion.control.straight` and is not ment to be called directly. If another 
+        movement is still running, e.g. started with :meth:`start_move` , a :class:`RuntimeError` 
+        is raised, because both wheels are controlled by one movement at a time. Four 
         digital PID controllers are used to make two cascade control loops, one cascade control loop
-        for each wheel. Each cascade control loop has the same parameters (P/I/D parameters), so that 
+        for each wheel, see :class:`cascade_pid` . Each cascade control loop has the same parameters (P/I/D parameters), so that 
         both wheels are controlled in the same way. Chosen default: Outer control loop is a PI 
         controller, inner control loop is a P controller. The outer loop is a position controller,
-        the inner loop a speed controller. After both wheels have reached their set-point (position), 
-        the method waits one second before the movement is marked as finished. This ensures that 
-        overshoots/oscillations are possible and that both wheels can independently reach their
-        set-point (position). The I part of each PID controller is limited to -1 and 1, so that 
+        the inner loop a speed controller. The movement is marked as finished as soon as both wheels 
+        are at rest at their set-point (position): the position error of both wheels must be within 
+        ``settle_band`` and the angle of each wheel must have changed by at most ``settle_speed`` 
+        times ``settle_time`` during the last ``settle_time`` . The change 
+        of the angle is used instead of the measured rotation speed, because the noise of the angle 
+        measurement averages out over ``settle_time`` , independent of ``sampling_time`` . 
+        This ensures that overshoots/oscillations are possible and that both wheels 
+        can independently reach their set-point (position), without waiting longer than needed.
+        If both wheels stay within ``settle_band`` for ``max_settle_time`` without being at rest, 
+        e.g. because of a noisy feedback signal, the movement is finished anyway and the 
+        attribute ``settled`` is False. Leaving ``settle_band`` , e.g. by an overshoot, starts 
+        ``max_settle_time`` again, so a movement is never finished outside of ``settle_band`` . If the movement takes longer than 
+        ``max_move_time`` , e.g. because a wheel is blocked, the wheels are stopped and a 
+        :class:`RuntimeError` is raised.
+        If ``max_velocity`` is set, the set-points (positions) do not jump to the target, but 
+        follow a trapezoidal or S-curve velocity profile, see :class:`motion_profile` , and the 
+        velocity of the profile is fed forward to the inner loops. So the wheels accelerate 
+        and decelerate in a defined way instead of by the limits of the controllers, which 
+        results in repeatable movement times without overshoots. The I part of each PID controller is limited to -1 and 1, so that 
         the sum of the errors is not integrated till infinity which means to very high or low values 
         which might cause problems. The output value of each inner PID controller is scaled between -1 
         and 1 and the output value of each outer PID controller is limited to -1 and 1.
@@ -312,12 +1178,17 @@ class control:
         the output of each PID controller matches the speed range of the servos, defined in 
         :meth:`lib_para_360_servo.write_pwm.set_speed` . A sliding median window is used to filter out
         the noise in the rotation speed measurement (ticks/s) which is done indirectly by measuring the 
-        position of the servo. Also a deadband filter after the error calculation of the outer control
+        position of the servo. If ``edge_timing`` is True, the change of the position is divided by 
+        the time between the falling edges of the feedback signal it was measured from, so that 
+        jitter of the control loop does not affect the speed measurement. Also a deadband filter after the error calculation of the outer control
         loop is implemented. This adjustments help to make the controllers more stable, e.g. filter out
         outliers while calculating the rotation speed and therefore avoid high value changes/jumps or
         avoid oscillations after reaching the set-point (position). The sample time of the digital PID
         controllers can also be freely chosen and does not influence the P/I/D parameters, the rotation
         speed measurement or the time before the movement is marked as finished.
+        If ``loop_stats`` is True, the compute time, period, jitter and missed deadlines
+        of each iteration are recorded in a :class:`loop_stats` object, which is 
+        available in the attribute ``stats`` after the movement.
 
         :param int,float number_ticks:
             Number of ticks the wheels have to move.
@@ -327,8 +1198,20 @@ class control:
         :param bool turn:
             True or False, if robot should turn. 
             **Default:** False.
+        :param motion_handle handle:
+            If set, the remaining ticks are stored in it in each iteration and the 
+            movement is stopped as soon as it is cancelled, see :meth:`start_move` .
+            **Default:** None.
         """
 
+        owner = self._check_idle(handle = handle)
+        try:
+            self._control_loop(number_ticks = number_ticks, straight = straight, turn = turn, handle = handle)
+        finally:
+            self._release(owner)
+
+    def _control_loop(self, number_ticks, straight, turn, handle):
+
         turns_l = 0
         turns_r = 0
 
@@ -349,199 +1232,140 @@ class control:
             #OPPOSITE direction to servo_r while turning
             target_angle_l = self.get_target_angle(number_ticks = -number_ticks, angle = angle_l)
 
-        #initial values sum_error_*
-        sum_error_r_p = 0
-        sum_error_r_s = 0
-        sum_error_l_p = 0
-        sum_error_l_s = 0
-        
-        #initial values error_*_old
-        error_l_p_old = 0
-        error_l_s_old = 0
-        error_r_p_old = 0
-        error_r_s_old = 0
-
-        #empty lists for ticks_*
-        list_ticks_l = []
-        list_ticks_r = []
+        #one cascade controller for each wheel, both with the same parameters
+        pid_l = cascade_pid(
+            sampling_time = self.sampling_time,
+            Kp_p = self.Kp_p, Ki_p = self.Ki_p, Kd_p = self.Kd_p,
+            Kp_s = self.Kp_s, Ki_s = self.Ki_s, Kd_s = self.Kd_s,
+            window = self.median_window, position_divider = self.position_divider)
+        pid_r = cascade_pid(
+            sampling_time = self.sampling_time,
+            Kp_p = self.Kp_p, Ki_p = self.Ki_p, Kd_p = self.Kd_p,
+            Kp_s = self.Kp_s, Ki_s = self.Ki_s, Kd_s = self.Kd_s,
+            window = self.median_window, position_divider = self.position_divider)
+        pid_l.reset(target_angle = target_angle_l)
+        pid_r.reset(target_angle = target_angle_r)
+
+        #the angles measured for the target angles are the previous angles 
+        #of the first iteration
+        prev_angle_l = angle_l
+        prev_angle_r = angle_r
+
+        #the set-points follow a velocity profile, None if switched off
+        if self.max_velocity is not None:
+            start_angle_l = angle_l
+            start_angle_r = angle_r
+            profile_l = motion_profile(distance = target_angle_l - angle_l, max_velocity = self.max_velocity, max_acceleration = self.max_acceleration, max_jerk = self.max_jerk)
+            profile_r = motion_profile(distance = target_angle_r - angle_r, max_velocity = self.max_velocity, max_acceleration = self.max_acceleration, max_jerk = self.max_jerk)
+            pid_l.set_target(target_angle = start_angle_l)
+            pid_r.set_target(target_angle = start_angle_r)
+            profile_start_time = time.monotonic()
+        else:
+            profile_l = None
 
         position_reached = False
-        reached_sp_counter = 0
-        #position must be reached for one second to allow
-        #overshoots/oscillations before stopping control loop
-        wait_after_reach_sp = 1/self.sampling_time
-
-        #start time of the control loop
-        start_time = time.time()
+        #both wheels must be at rest at the set-point for settle_time to allow
+        #overshoots/oscillations before stopping control loop, the total angles
+        #of the last settle_time are kept for the change of the angles
+        wait_after_reach_sp = max(1, round(self.settle_time/self.sampling_time))
+        settle_angles = collections.deque(maxlen = wait_after_reach_sp + 1)
+        max_settle_change = self.settle_speed * wait_after_reach_sp * self.sampling_time
+        settle_start_time = None
+        self.settled = None
+        move_start_time = time.monotonic()
+
+        #timing statistics of the control loop, None if switched off
+        stats = loop_stats(sampling_time = self.sampling_time) if self.loop_stats else None
+        self.stats = stats
+        start_time_prev_loop = None
+
+        #the control loop runs with absolute deadlines on the monotonic clock
+        timer = lib_realtime.deadline_timer(period = self.sampling_time)
 
         #control loop:
         while not position_reached:
-            #DEBUGGING OPTION:
-            #printing runtime of loop , see end of while true loop
-            #start_time_each_loop = time.time()
-
-            angle_l = self.get_angle_l()
-            angle_r = self.get_angle_r()
-
-            #try needed, because:
-            #- first iteration of the while loop prev_angle_* is missing and the 
-            #method self.get_total_angle() will throw an exception.
-            #- second iteration of the while loop prev_total_angle_* is missing, 
-            #which will throw another exception
-            try:
-                turns_l, total_angle_l = self.get_total_angle(angle_l, self.unitsFC, prev_angle_l, turns_l)
-                turns_r, total_angle_r = self.get_total_angle(angle_r, self.unitsFC, prev_angle_r, turns_r)
-
-                #### cascade control right wheel
-
-                ## Position Control
-                #Er = SP - PV
-                error_r_p = target_angle_r - total_angle_r
-
-                #Deadband-Filter to remove ocillating forwards and backwards after reaching set-point
-                if error_r_p <= 2 and error_r_p >= -2:
-                    error_r_p = 0
-                #I-Part
-                sum_error_r_p += error_r_p
-                #limit I-Part to -1 and 1 
-                #try needed, because Ki_p can be zero
-                try:
-                    sum_error_r_p = max(min(1/self.Ki_p, sum_error_r_p), -1/self.Ki_p)
-                except Exception:
-                    pass
-
-                #PID-Controller
-                output_r_p = self.Kp_p * error_r_p + self.Ki_p * self.sampling_time * sum_error_r_p + self.Kd_p / self.sampling_time * (error_r_p - error_r_p_old)
-                #limit output of position control to speed range
-                output_r_p = max(min(1, output_r_p), -1)
-
-                error_r_p_old = error_r_p
-
-                ## Speed Control
-                #convert range output_r_p from -1 to 1 to ticks/s
-                #full speed of a wheel forward and backward = +-650 ticks/s
-                output_r_p_con = 650 * output_r_p
-                #ticks per second (ticks/s), calculated from a moving median window with 5 values
-                ticks_r = (total_angle_r - prev_total_angle_r) / self.sampling_time
-                list_ticks_r.append(ticks_r)
-                list_ticks_r = list_ticks_r[-5:]
-                ticks_r = statistics.median(list_ticks_r)
-                
-                #Er = SP - PV
-                error_r_s = output_r_p_con - ticks_r
-
-                #I-Part
-                sum_error_r_s += error_r_s
-                #limit I-Part to -1 and 1
-                #try needed, because Ki_s can be zero
-                try:
-                    sum_error_r_s = max(min(650/self.Ki_s, sum_error_r_s), -650/self.Ki_s)
-                except Exception:
-                    pass
-
-                #PID-Controller
-                output_r_s = self.Kp_s * error_r_s + self.Ki_s * self.sampling_time * sum_error_r_s + self.Kd_s / self.sampling_time * (error_r_s - error_r_s_old)
-
-                error_r_s_old = error_r_s
-
-                #convert range output_r_s fom ticks/s to -1 to 1
-                output_r_s_con = output_r_s / 650
-
-                self.set_speed_r(output_r_s_con)
-
-                #### cascade control left wheel
-                
-                ## Position Control
-                #Er = SP - PV
-                error_l_p = target_angle_l - total_angle_l
-                #Deadband-Filter to remove ocillating forwards and backwards after reaching set-point
-                if error_l_p <= 2 and error_l_p >= -2:
-                    error_l_p = 0
-                #I-Part
-                sum_error_l_p += error_l_p
-
-                #limit I-Part to -1 and 1
-                #try needed, because Ki_p can be zero
-                try:
-                    sum_error_l_p = max(min(1/self.Ki_p, sum_error_l_p), -1/self.Ki_p)
-                except Exception:
-                    pass
-
-                #PID-Controller
-                output_l_p = self.Kp_p * error_l_p + self.Ki_p * self.sampling_time * sum_error_l_p + self.Kd_p / self.sampling_time * (error_l_p - error_l_p_old)
-                #limit output of position control to speed range
-                output_l_p = max(min(1, output_l_p), -1)
-
-                error_l_p_old = error_l_p
-
-                ## Speed Control
-                #convert range output_l_p from -1 to 1 to ticks/s
-                #full speed of a wheel forward and backward = +-650 ticks/s
-                output_l_p_con = 650 * output_l_p
-                #ticks per second (ticks/s), calculated from a moving median window with 5 values
-                ticks_l = (total_angle_l - prev_total_angle_l) / self.sampling_time
-                list_ticks_l.append(ticks_l)
-                list_ticks_l = list_ticks_l[-5:]
-                ticks_l = statistics.median(list_ticks_l)
-                #Er = SP - PV
-                error_l_s = output_l_p_con - ticks_l
-
-                #I-Part
-                sum_error_l_s += error_l_s
-                #limit I-Part to -1 and 1
-                #try needed, because Ki_s can be zero
-                try:
-                    sum_error_l_s = max(min(650/self.Ki_s, sum_error_l_s), -650/self.Ki_s)
-                except Exception:
-                    pass
-
-                #PID-Controller
-                output_l_s = self.Kp_s * error_l_s + self.Ki_s * self.sampling_time * sum_error_l_s + self.Kd_s / self.sampling_time * (error_l_s - error_l_s_old)
-
-                error_l_s_old = error_l_s
-
-                #convert range output_l_s fom ticks/s to -1 to 1
-                output_l_s_con = output_l_s / 650
-
-                self.set_speed_l(output_l_s_con)
-
-            except Exception:
-                pass
+
+            if stats is not None:
+                start_time_each_loop = time.perf_counter()
+
+            #the ticks of the feedback edges are used for the rotation speed
+            duty_cycle_l, tick_l = self.l_wheel.read_with_tick()
+            duty_cycle_r, tick_r = self.r_wheel.read_with_tick()
+            if not self.edge_timing:
+                tick_l = None
+                tick_r = None
+            angle_l = self.get_angle_l(duty_cycle = duty_cycle_l)
+            angle_r = self.get_angle_r(duty_cycle = duty_cycle_r)
+
+            turns_l, total_angle_l = self.get_total_angle(angle_l, self.unitsFC, prev_angle_l, turns_l)
+            turns_r, total_angle_r = self.get_total_angle(angle_r, self.unitsFC, prev_angle_r, turns_r)
+
+            if profile_l is not None:
+                profile_time = time.monotonic() - profile_start_time
+                position_l, velocity_l = profile_l.sample(profile_time)
+                position_r, velocity_r = profile_r.sample(profile_time)
+                pid_l.set_target(target_angle = start_angle_l + position_l, feedforward = self.feedforward * velocity_l)
+                pid_r.set_target(target_angle = start_angle_r + position_r, feedforward = self.feedforward * velocity_r)
+
+            #step() returns None as long as the controller warms up
+            output_r = pid_r.step(total_angle = total_angle_r, tick = tick_r)
+            if output_r is not None:
+                self.set_speed_r(output_r)
+
+            output_l = pid_l.step(total_angle = total_angle_l, tick = tick_l)
+            if output_l is not None:
+                self.set_speed_l(output_l)
 
             prev_angle_l = angle_l
             prev_angle_r = angle_r
 
-            #try needed, because first iteration of the while loop prev_angle_* is
-            #missing and the method self.get_total_angle() will throw an exception,
-            #and therefore no total_angle_* gets calculated
-
-            try:
-                prev_total_angle_l = total_angle_l
-                prev_total_angle_r = total_angle_r
-            except Exception:
-                pass
-
-            try:
-                if error_l_p == 0 and error_r_p == 0:
-                    reached_sp_counter += 1
-
-                    if reached_sp_counter >= wait_after_reach_sp:
-                        self.set_speed_r(0.0)
-                        self.set_speed_l(0.0)
+            if handle is not None:
+                if handle.cancel_requested.is_set():
+                    self.set_speed_r(0.0)
+                    self.set_speed_l(0.0)
+                    break
+                handle.remaining_ticks = (abs(target_angle_l - total_angle_l) + abs(target_angle_r - total_angle_r)) / 2
+
+            now = time.monotonic()
+            settle_angles.append((total_angle_l, total_angle_r))
+            if abs(target_angle_l - total_angle_l) <= self.settle_band and abs(target_angle_r - total_angle_r) <= self.settle_band:
+                if settle_start_time is None:
+                    settle_start_time = now
+
+                #change of the angles over settle_time, an overshoot or oscillation 
+                #through the set-point changes them by more than max_settle_change
+                if len(settle_angles) > wait_after_reach_sp:
+                    oldest_angle_l, oldest_angle_r = settle_angles[0]
+                    if abs(total_angle_l - oldest_angle_l) <= max_settle_change and abs(total_angle_r - oldest_angle_r) <= max_settle_change:
+                        self.settled = True
                         position_reached = True
-                else:
-                    pass
 
-            except Exception:
-                pass
-
-            #Pause control loop for chosen sample time
-            #https://stackoverflow.com/questions/474528/what-is-the-best-way-to-repeatedly-execute-a-function-every-x-seconds-in-python/25251804#25251804
-            time.sleep(self.sampling_time - ((time.time() - start_time) % self.sampling_time))
+                #only finished within settle_band, so the position error stays bounded
+                if not position_reached and self.max_settle_time is not None and now - settle_start_time >= self.max_settle_time:
+                    self.settled = False
+                    position_reached = True
+            else:
+                #the wheels left settle_band, e.g. an overshoot, so max_settle_time starts again
+                settle_start_time = None
+
+            if position_reached:
+                self.set_speed_r(0.0)
+                self.set_speed_l(0.0)
+            elif self.max_move_time is not None and now - move_start_time >= self.max_move_time:
+                self.set_speed_r(0.0)
+                self.set_speed_l(0.0)
+                raise RuntimeError('{} {}'.format('movement not finished after max_move_time:', self.max_move_time))
+
+            if stats is not None:
+                compute_time = time.perf_counter() - start_time_each_loop
+                if start_time_prev_loop is None:
+                    stats.record(compute_time = compute_time)
+                else:
+                    stats.record(compute_time = compute_time, period = start_time_each_loop - start_time_prev_loop)
+                start_time_prev_loop = start_time_each_loop
 
-            #DEBUGGING OPTION: 
-            #printing runtime of loop, see beginning of while true loop
-            #print('{:.20f}'.format((time.time() - start_time_each_loop)))
+            #Pause control loop until the next deadline, missed deadlines are skipped
+            timer.wait()
         
         return None
 
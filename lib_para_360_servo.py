@@ -1,9 +1,11 @@
+import array
 import collections
-import statistics
 import time
 
 import pigpio
 
+import lib_filter
+
 #https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
 #http://gpiozero.readthedocs.io/en/stable/remote_gpio.html
 #https://gpiozero.readthedocs.io/en/stable/recipes.html#pin-numbering
@@ -143,6 +145,30 @@ class read_pwm:
     :param int gpio:
         GPIO identified by their Broadcom number, see elinux.org_ .
         To this GPIO the feedback wire of the servo has to be connected.
+    :param int median_window:
+        If set, the measured duty cycles are filtered with a sliding median window 
+        of ``median_window`` values, see :class:`lib_filter.median_filter` , and
+        :meth:`read` returns the filtered duty cycle.
+        **Default:** None, so the duty cycles are not filtered.
+    :param int buffer_size:
+        If set, the last ``buffer_size`` measured duty cycles are stored together with
+        the tick of their falling edge in a ring buffer, see :meth:`read_since` and 
+        :meth:`read_at` . The ring buffer is preallocated, so storing a duty cycle does not
+        allocate memory. At 910 Hz a ``buffer_size`` of 910 holds the last second.
+        **Default:** None, so no duty cycles are stored.
+    :param bool raw_ticks:
+        If True, the callback function only stores the high time of the signal in 
+        microseconds (ticks) as integer, also in the ring buffer. The conversion to the 
+        duty cycle is deferred until it is read, e.g. with :meth:`read` , :meth:`read_since` 
+        or :meth:`convert` . This reduces the load of the callback thread, which is 
+        called about 1800 times a second per servo. Can not be combined with ``median_window`` .
+        **Default:** False, so the duty cycle is calculated in the callback function.
+
+    .. note::
+        The duty cycle jumps between its min and max value once per revolution. The 
+        median of a window over this jump is delayed by half of the window, so the 
+        window should be kept small. For the same reason, :meth:`read_at` does not 
+        interpolate over this jump.
 
     .. todo::
         Enable the class to be able to handle different signals, not just 910 Hz.
@@ -151,19 +177,43 @@ class read_pwm:
     .. _`360_data_sheet`: https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
     """
 
-    def __init__(self, pi, gpio):
+    def __init__(self, pi, gpio, median_window = None, buffer_size = None, raw_ticks = False):
+
+        if raw_ticks and median_window is not None:
+            raise ValueError('median_window can not be combined with raw_ticks')
 
         self.pi = pi
         self.gpio = gpio
         self.period = 1/910*1000000
         self.tick_high = None
+        self.tick = None
+        self.high_ticks = None
         self.duty_cycle = None
+        #duty cycle (or high time if raw_ticks is True) and tick of its falling edge,
+        #published as one tuple, so that reading it never mixes two periods
+        self.latest = (None, None)
         self.duty_scale = 1000
+        self.raw_ticks = raw_ticks
+        self.filter = None if median_window is None else lib_filter.median_filter(window = median_window)
+
+        #ring buffer of ticks (unsigned 32 bit) and duty cycles or high times 
+        #(unsigned 32 bit) if raw_ticks is True
+        #https://docs.python.org/3/library/array.html
+        self.buffer_size = buffer_size
+        if buffer_size:
+            self.buffer_ticks = array.array('L', [0]) * buffer_size
+            if raw_ticks:
+                self.buffer_duty_cycles = array.array('L', [0]) * buffer_size
+            else:
+                self.buffer_duty_cycles = array.array('d', [0.0]) * buffer_size
+        self.buffer_index = 0
+        self.buffer_count = 0
 
         #http://abyz.me.uk/rpi/pigpio/python.html#set_mode
         self.pi.set_mode(gpio=self.gpio, mode=pigpio.INPUT)
         #http://abyz.me.uk/rpi/pigpio/python.html#callback
-        self.cb = self.pi.callback(user_gpio=self.gpio, edge=pigpio.EITHER_EDGE, func=self.cbf)
+        #the callback function is chosen once, to not check raw_ticks for every edge
+        self.cb = self.pi.callback(user_gpio=self.gpio, edge=pigpio.EITHER_EDGE, func=self.cbf_raw if raw_ticks else self.cbf)
 
     #calculate the duty cycle
     def cbf(self, gpio, level, tick):
@@ -180,10 +230,55 @@ class read_pwm:
                 #Tested: This is handled by the tickDiff function internally, if t1 (earlier tick)
                 #is smaller than t2 (later tick), which could happen every 72 min. The result will
                 #not be a negative value, the real difference will be properly calculated.
-                self.duty_cycle = self.duty_scale*pigpio.tickDiff(t1=self.tick_high, t2=tick)/self.period
+                duty_cycle = self.duty_scale*pigpio.tickDiff(t1=self.tick_high, t2=tick)/self.period
 
             except Exception:
-                pass
+                return
+
+            if self.filter is not None:
+                duty_cycle = self.filter.update(duty_cycle)
+            self.duty_cycle = duty_cycle
+            self.tick = tick
+            self.latest = (duty_cycle, tick)
+
+            if self.buffer_size:
+                index = self.buffer_index
+                self.buffer_ticks[index] = tick
+                self.buffer_duty_cycles[index] = duty_cycle
+                index += 1
+                self.buffer_index = 0 if index == self.buffer_size else index
+                if self.buffer_count < self.buffer_size:
+                    self.buffer_count += 1
+
+        #change to high (a rising edge)
+        elif level == 1:
+
+            self.tick_high = tick
+
+    #store the high time, the duty cycle is calculated when reading it
+    def cbf_raw(self, gpio, level, tick):
+
+        #change to low (a falling edge)
+        if level == 0:
+            #if first edge is a falling one the following code will fail
+            try:
+                #masking the difference handles the wrap around like tickDiff
+                high_ticks = (tick - self.tick_high) & 0xFFFFFFFF
+            except TypeError:
+                return
+
+            self.high_ticks = high_ticks
+            self.tick = tick
+            self.latest = (high_ticks, tick)
+
+            if self.buffer_size:
+                index = self.buffer_index
+                self.buffer_ticks[index] = tick
+                self.buffer_duty_cycles[index] = high_ticks
+                index += 1
+                self.buffer_index = 0 if index == self.buffer_size else index
+                if self.buffer_count < self.buffer_size:
+                    self.buffer_count += 1
 
         #change to high (a rising edge)
         elif level == 1:
@@ -200,8 +295,175 @@ class read_pwm:
         :rtype: float
         """
 
+        if self.raw_ticks:
+            high_ticks = self.high_ticks
+            return None if high_ticks is None else self.duty_scale*high_ticks/self.period
+
         return self.duty_cycle
 
+    def read_with_tick(self):
+        """
+        Returns the recent measured duty cycle and the tick of its falling edge.
+
+        Both values belong to the same period of the signal, so the tick can be used
+        to calculate the rotation speed with the real time between two duty cycles.
+
+        :return: Recent measured duty cycle and tick of its falling edge, 
+            (None, None) if no duty cycle was measured yet.
+        :rtype: tuple
+        """
+
+        #replacing the tuple is atomic, so both values belong to the same period
+        duty_cycle, tick = self.latest
+        if self.raw_ticks and duty_cycle is not None:
+            duty_cycle = self.duty_scale*duty_cycle/self.period
+
+        return duty_cycle, tick
+
+    def read_raw(self):
+        """
+        Returns the recent measured high time of the signal in microseconds (ticks).
+
+        Only available if ``raw_ticks`` is True.
+
+        :return: Recent measured high time
+        :rtype: int
+        """
+
+        return self.high_ticks
+
+    def convert(self, high_ticks):
+        """
+        Converts high times of the signal to duty cycles.
+
+        This method converts many high times at once, e.g. the high times returned by 
+        :meth:`read_since` with ``raw`` set to True.
+
+        :param high_ticks:
+            Iterable of high times in microseconds (ticks).
+        :return: Duty cycles in the order of ``high_ticks`` .
+        :rtype: list
+        """
+
+        duty_scale = self.duty_scale
+        period = self.period
+
+        return [duty_scale*high/period for high in high_ticks]
+
+    def read_latest(self, tick = None):
+        """
+        Returns the recent measured duty cycle and its age.
+
+        This method returns the recent measured duty cycle and the time which 
+        passed since its falling edge. With the age, a lost feedback signal can 
+        be detected: if the age is much bigger than the period of the signal 
+        (1099 µs at 910 Hz), no new duty cycle was measured.
+
+        :param int tick:
+            Current tick, see get_current_tick_ .
+            **Default:** None, so the current tick is read from ``pi`` .
+        :return: Recent measured duty cycle and its age in microseconds, 
+            (None, None) if no duty cycle was measured yet.
+        :rtype: tuple
+
+        .. _get_current_tick: http://abyz.me.uk/rpi/pigpio/python.html#get_current_tick
+        """
+
+        duty_cycle, tick_duty_cycle = self.read_with_tick()
+
+        if tick_duty_cycle is None:
+            return None, None
+
+        if tick is None:
+            tick = self.pi.get_current_tick()
+
+        return duty_cycle, pigpio.tickDiff(t1=tick_duty_cycle, t2=tick)
+
+    def _buffer_oldest_first(self):
+
+        #indices of the ring buffer from the oldest to the newest stored duty cycle
+        count = self.buffer_count
+        start = self.buffer_index - count
+        for i in range(start, start + count):
+            yield i % self.buffer_size
+
+    def read_since(self, tick, raw = False):
+        """
+        Returns all stored duty cycles measured after a tick.
+
+        This method returns all duty cycles of the ring buffer, see ``buffer_size`` , 
+        whose falling edge is later than ``tick`` . The wrap around of the ticks is
+        handled, as long as ``tick`` is not older than about 35 minutes.
+
+        :param int tick:
+            Tick after which the duty cycles were measured.
+        :param bool raw:
+            If True and ``raw_ticks`` is True, the high times are returned instead 
+            of the duty cycles, see :meth:`convert` .
+            **Default:** False.
+        :return: List of (tick, duty cycle) tuples, ordered from the oldest to the newest.
+        :rtype: list
+        """
+
+        if not self.buffer_size:
+            raise ValueError('read_since needs a buffer_size')
+
+        samples = []
+        for i in self._buffer_oldest_first():
+            sample_tick = self.buffer_ticks[i]
+            #ticks older than tick give a difference of (nearly) 2**32
+            difference = pigpio.tickDiff(t1=tick, t2=sample_tick)
+            if 0 < difference < 2**31:
+                samples.append((sample_tick, self.buffer_duty_cycles[i]))
+
+        if self.raw_ticks and not raw:
+            duty_cycles = self.convert(value for _, value in samples)
+            samples = [(sample[0], duty_cycle) for sample, duty_cycle in zip(samples, duty_cycles)]
+
+        return samples
+
+    def read_at(self, tick):
+        """
+        Returns the duty cycle at a tick, interpolated out of the stored duty cycles.
+
+        This method linearly interpolates the duty cycle at ``tick`` between the two 
+        stored duty cycles measured before and after it, see ``buffer_size`` . If 
+        ``tick`` is newer than the newest stored duty cycle, the newest one is returned. 
+        If the two duty cycles are more than half of the range apart (the duty cycle 
+        jumped between its min and max value), the one closer to ``tick`` is returned.
+
+        :param int tick:
+            Tick at which the duty cycle is needed.
+        :return: Duty cycle at ``tick`` , or None if ``tick`` is older than the oldest 
+            stored duty cycle.
+        :rtype: float
+        """
+
+        if not self.buffer_size:
+            raise ValueError('read_at needs a buffer_size')
+
+        prev_tick = None
+        prev_duty_cycle = None
+        for i in self._buffer_oldest_first():
+            sample_tick = self.buffer_ticks[i]
+            duty_cycle = self.buffer_duty_cycles[i]
+            if self.raw_ticks:
+                duty_cycle = self.duty_scale*duty_cycle/self.period
+            difference = pigpio.tickDiff(t1=tick, t2=sample_tick)
+            #first duty cycle measured at or after tick
+            if difference < 2**31:
+                if prev_tick is None:
+                    return duty_cycle if difference == 0 else None
+                span = pigpio.tickDiff(t1=prev_tick, t2=sample_tick)
+                elapsed = pigpio.tickDiff(t1=prev_tick, t2=tick)
+                if abs(duty_cycle - prev_duty_cycle) > self.duty_scale / 2:
+                    return prev_duty_cycle if elapsed * 2 < span else duty_cycle
+                return prev_duty_cycle + (duty_cycle - prev_duty_cycle) * elapsed / span
+            prev_tick = sample_tick
+            prev_duty_cycle = duty_cycle
+
+        return prev_duty_cycle
+
     def cancel(self):
         """
         Cancel the started callback function.
@@ -225,27 +487,50 @@ class calibrate_pwm:
     servo has slightly different min/max duty cycle values, different than the once 
     provided in the data sheet 360_data_sheet_ . Values smaller and bigger than the 
     printed out once as "duty_cycle_min/duty_cycle_max" are outliers and should 
-    therefore not be considered. This can be seen in the printouts of smallest/biggest 
-    250 values. There are sometimes a few outliers. Compare the printouts of different
+    therefore not be considered. This can be seen in the printouts of the smallest/biggest 
+    values. There are sometimes a few outliers. Compare the printouts of different
     runs to get a feeling for it.
 
+    The high time of the feedback signal is measured in whole microseconds (ticks), so
+    only about 1100 different duty cycles are possible. Instead of storing every measured
+    duty cycle, the callback function counts how often each high time was measured in a
+    histogram with one bin per microsecond. The memory needed is therefore independent 
+    of ``measurement_time`` and ``duty_cycle_min`` / ``duty_cycle_max`` are calculated
+    exactly out of the histogram, see :meth:`get_duty_cycle_min` and :meth:`get_duty_cycle_max` .
+
+    Creating an instance does not start the measurement. :meth:`run` makes a measurement,
+    blocks until it is finished and prints out the results. It stops as soon as 
+    ``duty_cycle_min`` and ``duty_cycle_max`` are stable over a number of revolutions,
+    which is normally much faster than ``measurement_time`` . :meth:`start` , :meth:`update` 
+    and :meth:`stop` allow making the measurement without blocking, e.g. to calibrate 
+    several servos at the same time.
+
     .. note::
         The robot wheels must be able to rotate free in the air for calibration.
         Rotating forward or backward might sometimes give slightly 
-        different results for min/max duty cycle. Choose the smallest value and the 
-        biggest value out of the forward and backward runs. Do both directions three 
-        times for each wheel, with speed = 0.2 and -0.2. Then 
-        chose the values. The speed has to be set manually, see :ref:`Examples`.
+        different results for min/max duty cycle, so the smallest value and the 
+        biggest value out of a forward and a backward measurement should be chosen. 
+        This class only measures, the servo has to be rotated meanwhile, e.g. with 
+        :meth:`write_pwm.set_speed` . :class:`calibrate_wheels` does all of this for 
+        both wheels at the same time: it sets the speeds (0.2 and -0.2 by default), 
+        measures with :meth:`start` , :meth:`update` and :meth:`stop` , chooses the 
+        values and saves them in a :class:`lib_calibration.calibration_store` , 
+        see :meth:`calibrate_wheels.run` .
 
     :param pigpio.pi pi: 
         Instance of a pigpio.pi() object.
     :param int gpio:
         GPIO identified by their Broadcom number, see elinux.org_ .
         To this GPIO the feedback wire of the servo has to be connected.
-    :param int,float measurement_time:
-        Time in seconds for how long duty cycle values will be collected, so for how long the
-        measurement will be made. **Default:** 120.
-    :returns: Printouts of different measurements
+    :param int,float report_interval:
+        Time in seconds between two printouts of the current ``duty_cycle_min`` / 
+        ``duty_cycle_max`` during the measurement in :meth:`run` . **Default:** 10.
+    :param str capture_file:
+        If set, all measured high times in microseconds are additionally stored 
+        and written as binary array of unsigned shorts (2 bytes each, native byte order)
+        to this file after the measurement, see :meth:`array.array.tofile` . It can be 
+        read with :meth:`array.array.fromfile` .
+        **Default:** None, so the measured values are not stored.
 
     At the moment, the period for a 910 Hz signal is hardcoded, as in :meth:`read_pwm` .
 
@@ -256,38 +541,267 @@ class calibrate_pwm:
     .. _`360_data_sheet`: https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
     """
 
-    def __init__(self, pi, gpio, measurement_time = 120):
+    def __init__(self, pi, gpio, report_interval = 10, capture_file = None):
          
         self.pi = pi
         self.gpio = gpio
         self.period = 1/910*1000000
+        self.report_interval = report_interval
         self.tick_high = None
-        self.duty_cycle = None
         self.duty_scale = 1000
-        self.list_duty_cycles = []
+        #one bin for each possible high time in microseconds, 
+        #the last bin counts all longer high times
+        self.max_high_ticks = int(self.period) + 1
+        self.histogram = array.array('L', [0]) * (self.max_high_ticks + 1)
+        self.number_of_values = 0
+        self.capture_file = capture_file
+        self.capture = array.array('H') if capture_file else None
+        #values taken out of the sorted measured values for min/max, see get_duty_cycle_min()
+        self.outliers = 10
         self.duty_cycle_min = None
         self.duty_cycle_max = None
+        #revolutions are counted by the jumps of the high time between min and max
+        self.prev_high_ticks = None
+        self.revolutions = 0
+        #estimates of min/max after each revolution, see update()
+        self.estimates = collections.deque()
+        self.tolerance = None
+        self.stable_revolutions = 0
+        self.cb = None
 
         #http://abyz.me.uk/rpi/pigpio/python.html#set_mode
         self.pi.set_mode(gpio=self.gpio, mode=pigpio.INPUT)
 
+    def start(self, tolerance = 1, revolutions = 5):
+        """
+        Starts the measurement without blocking.
+
+        This method starts collecting duty cycles in the background and returns 
+        immediately. The progress can be checked with :meth:`update` , the measurement
+        is stopped with :meth:`stop` .
+
+        :param int,float tolerance:
+            Max change of ``duty_cycle_min`` and ``duty_cycle_max`` over ``revolutions``
+            revolutions to count them as stable.
+            **Default:** 1, so about one possible step of the duty cycle (0.91).
+        :param int revolutions:
+            Number of revolutions over which ``duty_cycle_min`` and ``duty_cycle_max`` 
+            have to be stable, see :meth:`update` .
+            **Default:** 5.
+        """
+
+        self.tolerance = tolerance
+        self.estimates = collections.deque(maxlen = revolutions + 1)
+        self.stable_revolutions = 0
+
         #http://abyz.me.uk/rpi/pigpio/python.html#callback
         self.cb = self.pi.callback(user_gpio=self.gpio, edge=pigpio.EITHER_EDGE, func=self.cbf)
-        
-        print('{}{}{}'.format('Starting measurements for: ', measurement_time, ' seconds.'))
-        print('----------------------------------------------------------')
-        time.sleep(measurement_time)
 
-        #stop callback before sorting list to avoid getting added new elements unintended
+    def update(self):
+        """
+        Updates the estimates and returns the progress of the measurement.
+
+        After each revolution of the servo, the current ``duty_cycle_min`` and 
+        ``duty_cycle_max`` are calculated. If both have not changed more than 
+        ``tolerance`` during the last ``revolutions`` revolutions, the measurement 
+        is converged. The confidence is the number of revolutions the estimates 
+        have been stable, divided by ``revolutions`` , limited to 1. This method 
+        must be called at least once per revolution, e.g. every 0.1 seconds.
+
+        :return: Progress with the keys ``'values'`` , ``'revolutions'`` , 
+            ``'duty_cycle_min'`` , ``'duty_cycle_max'`` , ``'confidence'`` and ``'converged'`` .
+        :rtype: dict
+        """
+
+        revolutions = self.revolutions
+        if not self.estimates or self.estimates[-1][0] != revolutions:
+            duty_cycle_min = self.get_duty_cycle_min()
+            duty_cycle_max = self.get_duty_cycle_max()
+            if duty_cycle_min is not None:
+                self.estimates.append((revolutions, duty_cycle_min, duty_cycle_max))
+                #count how many revolutions in a row the estimates stayed within the tolerance
+                first = self.estimates[0]
+                if abs(duty_cycle_min - first[1]) <= self.tolerance and abs(duty_cycle_max - first[2]) <= self.tolerance:
+                    self.stable_revolutions = revolutions - first[0]
+                else:
+                    self.stable_revolutions = 0
+                    self.estimates.clear()
+                    self.estimates.append((revolutions, duty_cycle_min, duty_cycle_max))
+
+        needed_revolutions = self.estimates.maxlen - 1
+        confidence = min(self.stable_revolutions / needed_revolutions, 1) if needed_revolutions else 1
+        last = self.estimates[-1] if self.estimates else (revolutions, None, None)
+
+        return {
+            'values': self.number_of_values,
+            'revolutions': revolutions,
+            'duty_cycle_min': last[1],
+            'duty_cycle_max': last[2],
+            'confidence': confidence,
+            'converged': confidence >= 1}
+
+    def stop(self):
+        """
+        Stops the measurement and calculates ``duty_cycle_min`` and ``duty_cycle_max`` .
+
+        If ``capture_file`` is set, the measured high times are written to it.
+        """
+
+        #stop callback before analyzing the histogram to avoid getting added new elements unintended
         #http://abyz.me.uk/rpi/pigpio/python.html#callback
-        self.cb.cancel()
+        if self.cb is not None:
+            self.cb.cancel()
+            self.cb = None
+
+        if self.capture is not None:
+            with open(self.capture_file, 'wb') as f:
+                self.capture.tofile(f)
+
+        self.duty_cycle_min = self.get_duty_cycle_min()
+        self.duty_cycle_max = self.get_duty_cycle_max()
+
+    def run(self, measurement_time = 120, tolerance = 1, revolutions = 5, poll_interval = 0.1):
+        """
+        Makes a measurement, blocks until it is finished and prints out the results.
+
+        The measurement stops as soon as ``duty_cycle_min`` and ``duty_cycle_max`` 
+        are stable (see :meth:`update` ), but after ``measurement_time`` at the latest.
+        Every ``report_interval`` seconds the progress is printed out.
+
+        :param int,float measurement_time:
+            Max time in seconds for how long duty cycle values will be collected, so for 
+            how long the measurement will be made. **Default:** 120.
+        :param int,float tolerance:
+            See :meth:`start` . **Default:** 1.
+        :param int revolutions:
+            See :meth:`start` . **Default:** 5. None disables the early stop, so 
+            the measurement always takes ``measurement_time`` .
+        :param float poll_interval:
+            Time in seconds between two checks of the progress. **Default:** 0.1.
+        :return: ``duty_cycle_min`` and ``duty_cycle_max`` , each None if not enough
+            duty cycles were measured.
+        :rtype: tuple
+        """
+
+        print('{}{}{}'.format('Starting measurements for max: ', measurement_time, ' seconds.'))
+        print('----------------------------------------------------------')
+        self.start(tolerance = tolerance, revolutions = revolutions or 0)
+        start_time = time.time()
+        next_report = self.report_interval
+        while True:
+            time.sleep(poll_interval)
+            elapsed_time = time.time() - start_time
+            progress = self.update()
+            if elapsed_time >= next_report:
+                next_report += self.report_interval
+                self.print_progress(progress)
+            if elapsed_time >= measurement_time or (revolutions and progress['converged']):
+                break
+
+        self.stop()
+        self.print_progress(progress)
         time.sleep(1)
+        self.print_results()
+
+        return self.duty_cycle_min, self.duty_cycle_max
+
+    def cbf(self, gpio, level, tick):
+
+        #change to low (a falling edge)
+        if level == 0:
+            #if first edge is a falling one the following code will not work
+            #a try first time is faster than an if-statement every time 
+            try:
+                high_ticks = pigpio.tickDiff(t1=self.tick_high, t2=tick)
+            except Exception:
+                return
+
+            self.histogram[min(high_ticks, self.max_high_ticks)] += 1
+            self.number_of_values += 1
+            if self.capture is not None:
+                self.capture.append(min(high_ticks, 65535))
+
+            #a jump of more than half of the range is a full revolution
+            if self.prev_high_ticks is not None and abs(high_ticks - self.prev_high_ticks) > self.max_high_ticks / 2:
+                self.revolutions += 1
+            self.prev_high_ticks = high_ticks
+
+        #change to high (a rising edge)
+        elif level == 1:
+
+            self.tick_high = tick
+
+    def to_duty_cycle(self, high_ticks):
+
+        return self.duty_scale*high_ticks/self.period
+
+    def _high_ticks_at_rank(self, rank, bins):
+
+        #walks through the bins and returns the bin of the value with the rank
+        count = 0
+        for high_ticks in bins:
+            count += self.histogram[high_ticks]
+            if count > rank:
+                return high_ticks
+
+        return None
+
+    def get_duty_cycle_min(self):
+        """
+        Returns the current estimate of the min duty cycle.
+
+        Like the median_high of the 20 smallest measured duty cycles, the 11th smallest
+        measured duty cycle is returned, so that a few outliers are not considered.
+        
+        :return: Min duty cycle, None if not enough duty cycles were measured.
+        :rtype: float
+        """
+
+        if self.number_of_values <= 2 * self.outliers:
+            return None
+
+        high_ticks = self._high_ticks_at_rank(self.outliers, range(len(self.histogram)))
+
+        return self.to_duty_cycle(high_ticks)
+
+    def get_duty_cycle_max(self):
+        """
+        Returns the current estimate of the max duty cycle.
+
+        Like the median_low of the 20 biggest measured duty cycles, the 11th biggest
+        measured duty cycle is returned, so that a few outliers are not considered.
         
-        self.list_duty_cycles = sorted(self.list_duty_cycles)
+        :return: Max duty cycle, None if not enough duty cycles were measured.
+        :rtype: float
+        """
+
+        if self.number_of_values <= 2 * self.outliers:
+            return None
+
+        high_ticks = self._high_ticks_at_rank(self.outliers, range(len(self.histogram) - 1, -1, -1))
+
+        return self.to_duty_cycle(high_ticks)
+
+    def print_progress(self, progress):
+
+        if progress['duty_cycle_min'] is None:
+            print('{} {}'.format('Not enough measured values:', progress['values']))
+        else:
+            print('{} {} {} {} {} {} {} {} {} {}'.format(
+                'Measured values:', progress['values'],
+                'revolutions:', progress['revolutions'],
+                'duty_cycle_min:', round(progress['duty_cycle_min'], 2),
+                'duty_cycle_max:', round(progress['duty_cycle_max'], 2),
+                'confidence:', round(progress['confidence'], 2)))
+
+    def print_results(self):
 
         #some analyzis of the dc values
-        sorted_set = list(sorted(set(self.list_duty_cycles)))
-        print('{} {}'.format('Ascending sorted distinct duty cycle values:', sorted_set))
+        distinct_high_ticks = [high_ticks for high_ticks, count in enumerate(self.histogram) if count]
+        sorted_set = [self.to_duty_cycle(high_ticks) for high_ticks in distinct_high_ticks]
+        print('{} {}'.format('Number of measured duty cycle values:', self.number_of_values))
+        print('----------------------------------------------------------')
+        print('{} {}'.format('Number of ascending sorted distinct duty cycle values:', len(sorted_set)))
         print('----------------------------------------------------------')
         differences_list = [sorted_set[i+1]-sorted_set[i] for i in range(len(sorted_set)-1)]
         rounded_differences_list = [round(differences_list[i],2) for i in range(len(differences_list)-1)]
@@ -295,42 +809,193 @@ class calibrate_pwm:
         print('{} {}'.format('Ascending counted, sorted and rounded distinct differences between duty cycle values:',counted_sorted_list))
         print('----------------------------------------------------------')
 
-        #Median and median_high/median_low are chosen, because the biggest 
-        #and smallest values are needed, and not an avarage of the smallest 
-        #and biggest values of the selection. 
-        #https://docs.python.org/3/library/statistics.html#statistics.median
-        print('{} {}'.format('Smallest 250 values:', self.list_duty_cycles[:250]))
-        self.duty_cycle_min = statistics.median_high(self.list_duty_cycles[:20])
+        #the smallest and biggest distinct values with how often they were measured
+        smallest = [(round(self.to_duty_cycle(high_ticks), 2), self.histogram[high_ticks]) for high_ticks in distinct_high_ticks[:10]]
+        biggest = [(round(self.to_duty_cycle(high_ticks), 2), self.histogram[high_ticks]) for high_ticks in distinct_high_ticks[-10:]]
+        print('{} {}'.format('Smallest 10 distinct values (duty cycle, count):', smallest))
         print('----------------------------------------------------------')
-        print('{} {}'.format('Biggest 250 values:',self.list_duty_cycles[-250:]))
-        self.duty_cycle_max = statistics.median_low(self.list_duty_cycles[-20:])
+        print('{} {}'.format('Biggest 10 distinct values (duty cycle, count):', biggest))
         print('----------------------------------------------------------')
 
+        self.duty_cycle_min = self.get_duty_cycle_min()
+        self.duty_cycle_max = self.get_duty_cycle_max()
+
+        if self.duty_cycle_min is None:
+            print('{} {}'.format('Not enough measured values:', self.number_of_values))
+            return
+
         print('duty_cycle_min:', round(self.duty_cycle_min,2))
 
         print('duty_cycle_max:', round(self.duty_cycle_max,2))
-        
-    def cbf(self, gpio, level, tick):
+            
+    def cancel(self):
 
-        #change to low (a falling edge)
-        if level == 0:
-            #if first edge is a falling one the following code will not work
-            #a try first time is faster than an if-statement every time 
-            try:
-                self.duty_cycle = self.duty_scale*pigpio.tickDiff(t1=self.tick_high, t2=tick)/self.period
-                self.list_duty_cycles.append(self.duty_cycle)
+        if self.cb is not None:
+            self.cb.cancel()
+            self.cb = None
 
-            except Exception:
-                pass
+class calibrate_wheels:
+    """
+    Calibrates both Parallax Feedback 360° High-Speed Servos of the robot at the same time.
 
-        #change to high (a rising edge)
-        elif level == 1:
+    This class drives both servos with :class:`write_pwm` and measures both feedback 
+    signals with :class:`calibrate_pwm` at the same time. For each speed in ``speeds`` 
+    one measurement is made, which stops as soon as the min/max duty cycles of both 
+    wheels are stable, see :meth:`calibrate_pwm.update` . Out of all measurements the 
+    smallest min duty cycle and the biggest max duty cycle of each wheel are chosen, 
+    as recommended in :class:`calibrate_pwm` . The results are named like the 
+    parameters of :class:`lib_motion.control` .
 
-            self.tick_high = tick
-            
-    def cancel(self):
+    .. note::
+        The robot wheels must be able to rotate free in the air for calibration.
 
-        self.cb.cancel()
+    .. warning::
+        Be carefull with setting the min and max pulsewidth! Test carefully ``min_pw`` and ``max_pw``
+        before setting them. Wrong values can damage the servo, see set_servo_pulsewidth_ !!!
+
+    :param pigpio.pi pi: 
+        Instance of a pigpio.pi() object.
+    :param int l_wheel_gpio:
+        GPIO identified by their Broadcom number, see elinux.org_ .
+        To this GPIO the feedback wire of the left servo has to be connected.
+        **Default:** 16.
+    :param int r_wheel_gpio:
+        GPIO identified by their Broadcom number, see elinux.org_ .
+        To this GPIO the feedback wire of the right servo has to be connected.
+        **Default:** 20.
+    :param int servo_l_gpio:
+        GPIO identified by their Broadcom number, see elinux.org_ .
+        To this GPIO the control wire of the left servo has to be connected.
+        **Default:** 17.
+    :param int servo_r_gpio:
+        GPIO identified by their Broadcom number, see elinux.org_ .
+        To this GPIO the control wire of the right servo has to be connected.
+        **Default:** 27.
+    :param int min_pw:
+        Min pulsewidth of both servos, see **Warning**, carefully test the value before!
+        **Default:** 1280, taken from the data sheet `360_data_sheet`_ .
+    :param int max_pw:
+        Max pulsewidth of both servos, see **Warning**, carefully test the value before!
+        **Default:** 1720, taken from the data sheet `360_data_sheet`_ .
+    :param int,float report_interval:
+        Time in seconds between two printouts of the progress. **Default:** 10.
+
+    .. _elinux.org: https://elinux.org/RPi_Low-level_peripherals#Model_A.2B.2C_B.2B_and_B2
+    .. _set_servo_pulsewidth: http://abyz.me.uk/rpi/pigpio/python.html#set_servo_pulsewidth
+    .. _`360_data_sheet`: https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
+    """
+
+    def __init__(
+        self, pi, l_wheel_gpio = 16, r_wheel_gpio = 20, servo_l_gpio = 17, servo_r_gpio = 27,
+        min_pw = 1280, max_pw = 1720, report_interval = 10):
+
+        self.pi = pi
+        self.l_wheel_gpio = l_wheel_gpio
+        self.r_wheel_gpio = r_wheel_gpio
+        self.report_interval = report_interval
+        self.servo_l = write_pwm(pi = self.pi, gpio = servo_l_gpio, min_pw = min_pw, max_pw = max_pw)
+        self.servo_r = write_pwm(pi = self.pi, gpio = servo_r_gpio, min_pw = min_pw, max_pw = max_pw)
+        self.results = None
+
+    def _measure(self, speed, measurement_time, tolerance, revolutions, poll_interval):
+
+        wheel_l = calibrate_pwm(pi = self.pi, gpio = self.l_wheel_gpio)
+        wheel_r = calibrate_pwm(pi = self.pi, gpio = self.r_wheel_gpio)
+
+        self.servo_l.set_speed(speed)
+        self.servo_r.set_speed(speed)
+        #buffer time for reaching the speed
+        time.sleep(1)
+
+        wheel_l.start(tolerance = tolerance, revolutions = revolutions)
+        wheel_r.start(tolerance = tolerance, revolutions = revolutions)
+        start_time = time.time()
+        next_report = self.report_interval
+        try:
+            while True:
+                time.sleep(poll_interval)
+                elapsed_time = time.time() - start_time
+                progress_l = wheel_l.update()
+                progress_r = wheel_r.update()
+                if elapsed_time >= next_report:
+                    next_report += self.report_interval
+                    print('{} {}'.format('speed:', speed))
+                    wheel_l.print_progress(progress_l)
+                    wheel_r.print_progress(progress_r)
+                if elapsed_time >= measurement_time or (progress_l['converged'] and progress_r['converged']):
+                    break
+        finally:
+            wheel_l.stop()
+            wheel_r.stop()
+            self.servo_l.stop()
+            self.servo_r.stop()
+
+        print('{} {} {} {}'.format('speed:', speed, 'measurement time:', round(elapsed_time, 1)))
+        wheel_l.print_progress(progress_l)
+        wheel_r.print_progress(progress_r)
+        print('----------------------------------------------------------')
+
+        return wheel_l, wheel_r
+
+    def run(
+        self, speeds = (0.2, -0.2), measurement_time = 120, tolerance = 1, revolutions = 5, poll_interval = 0.1,
+        calibration = None, robot_id = None):
+        """
+        Calibrates both wheels and prints out the results.
+
+        :param tuple speeds:
+            Speeds at which one measurement each is made, see :meth:`write_pwm.set_speed` .
+            **Default:** (0.2, -0.2), so forward and backward.
+        :param int,float measurement_time:
+            Max time in seconds of each measurement. **Default:** 120.
+        :param int,float tolerance:
+            See :meth:`calibrate_pwm.start` . **Default:** 1.
+        :param int revolutions:
+            See :meth:`calibrate_pwm.start` . **Default:** 5.
+        :param float poll_interval:
+            Time in seconds between two checks of the progress. **Default:** 0.1.
+        :param lib_calibration.calibration_store calibration:
+            If set, the results are saved in it, so that :class:`lib_motion.control` 
+            loads them, see :class:`lib_calibration.calibration_store` .
+            **Default:** None, so the results are not saved.
+        :param str robot_id:
+            Id of the robot in ``calibration`` . **Default:** None, so the hostname.
+        :return: ``dcMin_l`` , ``dcMax_l`` , ``dcMin_r`` and ``dcMax_r`` , 
+            see :class:`lib_motion.control` .
+        :rtype: dict
+        """
+
+        dc_min_l = []
+        dc_max_l = []
+        dc_min_r = []
+        dc_max_r = []
+
+        for speed in speeds:
+            wheel_l, wheel_r = self._measure(speed, measurement_time, tolerance, revolutions, poll_interval)
+            if wheel_l.duty_cycle_min is not None:
+                dc_min_l.append(wheel_l.duty_cycle_min)
+                dc_max_l.append(wheel_l.duty_cycle_max)
+            if wheel_r.duty_cycle_min is not None:
+                dc_min_r.append(wheel_r.duty_cycle_min)
+                dc_max_r.append(wheel_r.duty_cycle_max)
+
+        if not dc_min_l or not dc_min_r:
+            raise RuntimeError('not enough duty cycles measured, check the feedback wires')
+
+        self.results = {
+            'dcMin_l': min(dc_min_l),
+            'dcMax_l': max(dc_max_l),
+            'dcMin_r': min(dc_min_r),
+            'dcMax_r': max(dc_max_r)}
+
+        for key, value in self.results.items():
+            print('{}: {}'.format(key, round(value, 2)))
+
+        if calibration is not None:
+            calibration.save(values = self.results, robot_id = robot_id)
+            print('{} {}'.format('saved in:', calibration.path))
+
+        return self.results
 
 if __name__ == "__main__":
 
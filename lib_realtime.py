@@ -0,0 +1,138 @@
+import ctypes
+import ctypes.util
+import os
+import time
+
+#flags of mlockall, see man 2 mlockall
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+class deadline_timer:
+    """
+    Periodic timer with absolute deadlines.
+
+    This class lets a loop run with a fixed period. The deadlines are calculated
+    from the start time with :func:`time.monotonic_ns` as multiples of the period,
+    so in contrast to sleeping a relative time, the time the loop itself needs
+    and the time :func:`time.sleep` oversleeps do not add up over the iterations,
+    and changes of the system time do not affect the loop. If a deadline is
+    missed by more than one period, the missed deadlines are skipped, so that
+    the loop does not try to catch up.
+
+    :param int,float period:
+        Period in seconds.
+    """
+
+    def __init__(self, period):
+
+        self.period_ns = int(round(period * 1000000000))
+        self.reset()
+
+    def reset(self):
+        """
+        Restarts the timer, the next deadline is one period from now.
+        """
+
+        self.deadline = time.monotonic_ns() + self.period_ns
+        #number of skipped deadlines since the start
+        self.missed = 0
+
+    def wait(self):
+        """
+        Sleeps until the next deadline.
+
+        :return: Time in nanoseconds the deadline was missed by, 0 if it was met.
+        :rtype: int
+        """
+
+        now = time.monotonic_ns()
+        late = now - self.deadline
+
+        if late < 0:
+            time.sleep(-late / 1000000000)
+            late = 0
+        elif late >= self.period_ns:
+            #skip the missed deadlines
+            skipped = late // self.period_ns
+            self.missed += skipped
+            self.deadline += skipped * self.period_ns
+
+        self.deadline += self.period_ns
+
+        return late
+
+def lock_memory():
+    """
+    Locks all current and future memory pages of the process into RAM with mlockall.
+
+    This avoids delays caused by page faults, e.g. if memory was swapped out.
+    Needs the capability CAP_IPC_LOCK or a high enough RLIMIT_MEMLOCK, e.g.
+    running as root.
+
+    :return: True if the memory was locked.
+    :rtype: bool
+    """
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno = True)
+        result = libc.mlockall(MCL_CURRENT | MCL_FUTURE)
+    except (OSError, AttributeError) as e:
+        print('{} {}'.format('mlockall not available:', e))
+        return False
+
+    if result != 0:
+        print('{} {}'.format('mlockall failed:', os.strerror(ctypes.get_errno())))
+        return False
+
+    return True
+
+def configure_thread(priority = 50, cpus = None, lock = True):
+    """
+    Makes the calling thread a real-time thread, as far as permitted.
+
+    The thread gets the scheduling policy SCHED_FIFO with ``priority`` , so that it
+    is not interrupted by threads with normal priority, e.g. other user code, and
+    is optionally pinned to ``cpus`` . Each setting which is not permitted (e.g. not
+    running as root) or not available (e.g. not running on Linux) is skipped with
+    a printed message, so the thread continues with normal priority.
+
+    :param int priority:
+        Priority between 1 (lowest) and 99 (highest). The pigpio daemon runs with
+        priority 99 and should not be blocked.
+        **Default:** 50, None leaves the scheduling policy unchanged.
+    :param set cpus:
+        Numbers of the CPUs the thread may run on, e.g. ``{3}`` .
+        **Default:** None, so all CPUs.
+    :param bool lock:
+        If True, the memory of the process is locked, see :func:`lock_memory` .
+        **Default:** True.
+    :return: Names of the applied settings, ``'priority'`` , ``'cpus'`` and ``'lock'`` .
+    :rtype: set
+    """
+
+    applied = set()
+
+    #pid 0 is the calling thread
+    if priority is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            applied.add('priority')
+        except (OSError, AttributeError) as e:
+            print('{} {}'.format('SCHED_FIFO not set:', e))
+
+    if cpus is not None:
+        try:
+            os.sched_setaffinity(0, cpus)
+            applied.add('cpus')
+        except (OSError, AttributeError) as e:
+            print('{} {}'.format('CPU affinity not set:', e))
+
+    if lock and lock_memory():
+        applied.add('lock')
+
+    return applied
+
+if __name__ == '__main__':
+
+    #just continue
+    pass
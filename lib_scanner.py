@@ -1,3 +1,6 @@
+import math
+import statistics
+import threading
 import time
 
 import pigpio
@@ -25,22 +28,45 @@ class hcsr04:
         GPIO.
         **Default:** 15, taken from the data sheet (10µs) and added 50%, to have a 
         buffer to surely trigger the measurement.
+    :param int,float measurement_cycle:
+        Min time in seconds between two trigger signals, so that the echo of the 
+        previous measurement has faded away before the next one starts.
+        **Default:** 0.06, taken from the data sheet `HC-SR04`_ .
+    :param int max_echo_delay:
+        Max time in microseconds between the trigger signal and the rising edge 
+        of the echo. Rising edges received later are rejected.
+        **Default:** 5000, the sensor starts the echo after sending the sonic 
+        bursts, which takes less than 1 ms.
 
     .. _elinux.org: https://elinux.org/RPi_Low-level_peripherals#Model_A.2B.2C_B.2B_and_B2
     .. _`HC-SR04`: https://cdn.sparkfun.com/assets/b/3/0/b/a/DGCH-RED_datasheet.pdf
     """
 
-    def __init__(self, pi, trigger, echo, pulse_len = 15):
+    def __init__(self, pi, trigger, echo, pulse_len = 15, measurement_cycle = 0.06, max_echo_delay = 5000):
 
         self.pi = pi
         self.trigger = trigger
         self.echo = echo
         self.pulse_len = pulse_len
+        self.measurement_cycle = measurement_cycle
+        self.max_echo_delay = max_echo_delay
+        self.trigger_time = None
+        self.trigger_tick = None
+        #sequence number of the last trigger signal and of the last complete echo,
+        #a measurement is running while they differ
+        self.sequence = 0
+        self.echo_sequence = 0
+        #set by the callback function when the falling edge is received
+        self.echo_received = threading.Event()
+        #function without arguments called by the callback function after 
+        #echo_received was set, e.g. to wake up an asyncio event loop
+        self.on_echo = None
         self.tick_high = None
-        self.tick_high_old = None
         self.tick_low = None
-        self.tick_low_old = None
         self.pulse_width = None
+        #statistics of the last measurement
+        self.retries = 0
+        self.rejected_edges = 0
 
         #http://abyz.me.uk/rpi/pigpio/python.html#set_mode
         self.pi.set_mode(gpio = self.trigger, mode = pigpio.OUTPUT)
@@ -49,41 +75,96 @@ class hcsr04:
         #http://abyz.me.uk/rpi/pigpio/python.html#callback
         self.cb = self.pi.callback(user_gpio=self.echo, edge=pigpio.EITHER_EDGE, func=self.cbf)
 
-    #calculates the duty cycle
+    #calculates the pulse width of the echo belonging to the current trigger signal
     def cbf(self, gpio, level, tick):
 
-        #change to low (falling edge)
-        if level == 0:
+        #edges are only accepted while a measurement is running
+        if self.sequence == self.echo_sequence:
+            self.rejected_edges += 1
+            return
 
-            self.tick_low = tick
-            #try is needed because one of t1 or t2 might be None and then tickDiff fails
-            try:
-                #http://abyz.me.uk/rpi/pigpio/python.html#callback
-                # tick        32 bit    The number of microseconds since boot
-                #                       WARNING: this wraps around from
-                #                       4294967295 to 0 roughly every 72 minutes
-                #Tested: This is handled by the tickDiff function internally, if t1 (earlier tick)
-                #is smaller than t2 (later tick), which could happen every 72 min. The result will
-                #not be a negative value, the real difference will be properly calculated.
-                self.pulse_width = pigpio.tickDiff(t1=self.tick_high, t2=self.tick_low)
-            except Exception:
-                pass
-            
         #change to high (rising edge)
-        elif level == 1:
+        if level == 1:
+
+            #http://abyz.me.uk/rpi/pigpio/python.html#callback
+            # tick        32 bit    The number of microseconds since boot
+            #                       WARNING: this wraps around from
+            #                       4294967295 to 0 roughly every 72 minutes
+            #Tested: This is handled by the tickDiff function internally, if t1 (earlier tick)
+            #is smaller than t2 (later tick), which could happen every 72 min. The result will
+            #not be a negative value, the real difference will be properly calculated.
+            #An edge from before the trigger signal results in a difference close
+            #to 2**32 and is rejected as well.
+            if self.tick_high is None and pigpio.tickDiff(t1=self.trigger_tick, t2=tick) <= self.max_echo_delay:
+                self.tick_high = tick
+            else:
+                self.rejected_edges += 1
+
+        #change to low (falling edge)
+        elif level == 0:
+
+            if self.tick_high is None:
+                self.rejected_edges += 1
+                return
 
-            self.tick_high = tick
+            self.tick_low = tick
+            self.pulse_width = pigpio.tickDiff(t1=self.tick_high, t2=self.tick_low)
+            #mark the measurement of this trigger signal as complete and wake up read()
+            self.echo_sequence = self.sequence
+            self.echo_received.set()
+            on_echo = self.on_echo
+            if on_echo is not None:
+                on_echo()
 
     def trig(self):
+        """
+        Sends the trigger signal, which starts a measurement.
+
+        If the previous trigger signal was sent less than ``measurement_cycle`` 
+        seconds ago, this method waits accordingly. The distance is returned 
+        by :meth:`read_echo` .
+        """
 
+        #wait until the measurement cycle since the previous trigger signal is over
+        if self.trigger_time is not None:
+            remaining_time = self.measurement_cycle - (time.monotonic() - self.trigger_time)
+            if remaining_time > 0:
+                time.sleep(remaining_time)
+
+        #close the window of a previous trigger signal, whose echo was not received
+        self.echo_sequence = self.sequence
+        self.echo_received.clear()
+        self.tick_high = None
+        self.tick_low = None
+        self.pulse_width = None
+        #the tick is taken before the trigger signal, so that the rising edge 
+        #of the echo is always later
+        self.trigger_tick = self.pi.get_current_tick()
+        #a new sequence number opens the window for the edges of this trigger signal
+        self.sequence += 1
         self.pi.gpio_trigger(user_gpio = self.trigger, pulse_len = self.pulse_len, level = 1)
+        self.trigger_time = time.monotonic()
 
-    def read(self, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, debug = False):
+    def read(self, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, max_retries = 3, debug = False):
         """
         Measures the distance to an object.
 
         This method triggers a measurement, does all the calculations and returns 
-        the distance in meters.
+        the distance in meters. It returns as soon as the callback function received 
+        the falling edge of the echo, the max time one measurement will need 
+        (calculated out of ``upper_limit`` , ``number_of_sonic_bursts`` and 
+        ``added_buffer`` ) is only used as timeout. If the previous measurement 
+        was triggered less than ``measurement_cycle`` seconds ago, the trigger
+        signal is delayed accordingly.
+
+        Each trigger signal gets a sequence number and only echo edges belonging 
+        to it are accepted: the rising edge has to follow the trigger signal within 
+        ``max_echo_delay`` and the falling edge has to follow this rising edge. 
+        All other edges, e.g. late echoes of a previous measurement, are rejected.
+        If no valid echo is received, the measurement is repeated up to 
+        ``max_retries`` times. The number of repeated measurements and rejected 
+        edges of the last call are stored in the attributes ``retries`` and 
+        ``rejected_edges`` .
 
         :param int,float temp_air: 
             Temperature of the air in degree celsius. 
@@ -98,52 +179,89 @@ class hcsr04:
             The added safety buffer for waiting for the distance measurement 
             to complete.
             **Default:** 2, so 100% safety buffer.
+        :param int max_retries:
+            Max number of repeated measurements, if no valid echo is received.
+            **Default:** 3.
         :param bool debug:
             Controls if debugging printouts are made or not. For more details, have
             a look at the source code. 
             **Default:** False, so no printouts are made.
         
-        :return: Measured distance in meters.
+        :return: Measured distance in meters, None if no valid echo was received.
         :rtype: float
 
         .. _`HC-SR04`: https://cdn.sparkfun.com/assets/b/3/0/b/a/DGCH-RED_datasheet.pdf
         """
         
-        #speed of sound
-        #at 20 degree celsius -> c_air = 343.42 m/s
-        c_air = 331.3 + (0.606 * temp_air)
-
-        #max time one measurement will need including safety buffer
-        #in this time frame the callback function should be called two times
-        #upper_limit * 2 -> because the sound has to pass the distance two times
-        wait_for_measurement = upper_limit * 2 / c_air * number_of_sonic_bursts * added_buffer
-        
-        #counter while loop
-        a = 0
+        for attempt in self.attempts(max_retries = max_retries, debug = debug):
 
-        #check if recognized rising and falling edges are valid, so correctly 
-        #detected by the callback function
-        while self.tick_high is None or self.tick_high is self.tick_high_old or self.tick_low is None or self.tick_low is self.tick_low_old or self.pulse_width is None:
-            
             self.trig()
-            time.sleep(wait_for_measurement)
+            distance = self.read_echo(temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer, debug = debug)
+            if distance is not None:
+                return distance
+
+        return None
+
+    def attempts(self, max_retries = 3, debug = False):
+        """
+        Retry policy of :meth:`read` .
+
+        This generator yields the number of the measurement attempt, 0 for the 
+        first measurement and 1 to ``max_retries`` for the repeated ones, and 
+        keeps the attributes ``retries`` and ``rejected_edges`` up to date. 
+        The caller makes one measurement per attempt and stops iterating as soon 
+        as it received a valid echo, so that it can also be used by code which 
+        waits differently for the echo, e.g. :meth:`lib_async.hcsr04.read` .
+
+        :param int max_retries:
+            See :meth:`read` . **Default:** 3.
+        :param bool debug:
+            See :meth:`read` . **Default:** False.
+        :return: Number of the attempt.
+        :rtype: generator
+        """
+
+        self.retries = 0
+        self.rejected_edges = 0
+        yield self.retries
+
+        while self.retries < max_retries:
+
+            self.retries += 1
             #debugging information
-            if a >= 1 and debug:
-                print('{} {} {} {}'.format('number of extra measurements:', a, 'at this time:', time.time()))
-            a=+1
+            if debug:
+                print('{} {} {} {}'.format('number of extra measurements:', self.retries, 'at this time:', time.time()))
+            yield self.retries
+
+        if debug:
+            print('{} {} {} {}'.format('no valid echo after retries:', self.retries, 'rejected edges:', self.rejected_edges))
+
+    def read_echo(self, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, debug = False):
+        """
+        Waits for the echo of the last trigger signal and returns the distance.
+
+        This method is used by :meth:`read` after each trigger signal. Together 
+        with :meth:`trig` it allows triggering several sensors first and then 
+        waiting for all echoes, see :class:`multi_scanner` . The parameters are 
+        the same as of :meth:`read` .
+
+        :return: Measured distance in meters, None if no valid echo was received.
+        :rtype: float
+        """
+
+        #returns as soon as the falling edge was received
+        if not self.echo_received.wait(timeout = self.measurement_timeout(temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer)):
+            #close the window, so that a late echo is rejected
+            self.echo_sequence = self.sequence
+            return None
+
+        #speed of sound
+        #at 20 degree celsius -> c_air = 343.42 m/s
+        c_air = 331.3 + (0.606 * temp_air)
 
         #calculated distance in m
         distance = self.pulse_width / 1000000 * c_air / 2
 
-        #and store the the last values of self.tick_high and self.tick_low
-        self.tick_high_old = self.tick_high
-        self.tick_low_old = self.tick_low
-        #and set self.tick_high and self.tick_low back to initial values
-        self.tick_high = None
-        self.tick_low = None
-        #and set self.pulse width back to initial value
-        self.pulse_width = None
-
         #check if measured/calculated distance is out of measurement range of the 
         #sensor, see datasheet
         if distance >= upper_limit:
@@ -156,6 +274,119 @@ class hcsr04:
 
         return distance
     
+    def measurement_timeout(self, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2):
+        """
+        Returns the max time one measurement will need, see :meth:`read` for the parameters.
+
+        :return: Time in seconds.
+        :rtype: float
+        """
+
+        #speed of sound
+        #at 20 degree celsius -> c_air = 343.42 m/s
+        c_air = 331.3 + (0.606 * temp_air)
+
+        #max time one measurement will need including safety buffer
+        #in this time frame the callback function should be called two times
+        #upper_limit * 2 -> because the sound has to pass the distance two times
+        return upper_limit * 2 / c_air * number_of_sonic_bursts * added_buffer
+
+    def read_burst(self, n = 5, method = 'median', trim = 0.2, temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, max_retries = 3, debug = False):
+        """
+        Measures the distance to an object several times and combines the measurements.
+
+        This method makes ``n`` measurements with :meth:`read` back-to-back, each 
+        one triggered as soon as the ``measurement_cycle`` of the previous one is 
+        over, and combines them to one distance, so that single outliers (e.g. a 
+        spike caused by a ghost echo) do not affect the result. Additionally the 
+        spread of the measurements is returned, estimated robustly as 1.4826 times 
+        the median absolute deviation, which equals the standard deviation for 
+        normally distributed measurements. Measurements without a valid echo are 
+        left out.
+
+        :param int n:
+            Number of measurements.
+            **Default:** 5.
+        :param str method:
+            How the measurements are combined, ``'median'`` or ``'trimmed_mean'`` ,
+            the mean after removing the ``trim`` share of the smallest and biggest 
+            measurements.
+            **Default:** ``'median'`` .
+        :param float trim:
+            Share of measurements removed on each side for ``'trimmed_mean'`` .
+            **Default:** 0.2, so 1 of 5 on each side.
+        :param int,float temp_air: 
+            See :meth:`read` . **Default:** 20.
+        :param int,float upper_limit: 
+            See :meth:`read` . **Default:** 4.
+        :param int number_of_sonic_bursts:
+            See :meth:`read` . **Default:** 8.
+        :param int,float added_buffer:
+            See :meth:`read` . **Default:** 2.
+        :param int max_retries:
+            See :meth:`read` . **Default:** 3.
+        :param bool debug:
+            See :meth:`read` . **Default:** False.
+
+        :return: Distance in meters and spread in meters, both None if no valid 
+            echo was received at all.
+        :rtype: tuple
+        """
+
+        #fail before measuring
+        self.check_method(method = method)
+
+        distances = []
+        for i in range(n):
+            distance = self.read(temp_air = temp_air, upper_limit = upper_limit, number_of_sonic_bursts = number_of_sonic_bursts, added_buffer = added_buffer, max_retries = max_retries, debug = debug)
+            if distance is not None:
+                distances.append(distance)
+
+        return self.combine(distances = distances, method = method, trim = trim, debug = debug)
+
+    def combine(self, distances, method = 'median', trim = 0.2, debug = False):
+        """
+        Combines several measurements to one distance, see :meth:`read_burst` for the parameters.
+
+        This method does not measure, so it is also used by :meth:`lib_async.hcsr04.read_burst` .
+
+        :param list distances:
+            Measured distances in meters, without None.
+        :return: Distance in meters and spread in meters, both None if ``distances`` is empty.
+        :rtype: tuple
+        """
+
+        self.check_method(method = method)
+
+        if not distances:
+            return None, None
+
+        median = statistics.median(distances)
+        spread = 1.4826 * statistics.median([abs(d - median) for d in distances])
+
+        if method == 'median':
+            distance = median
+        else:
+            distances = sorted(distances)
+            k = int(len(distances) * trim)
+            distance = statistics.mean(distances[k:len(distances) - k])
+
+        if debug:
+            print('{} {} {} {}'.format('measurements:', distances, 'spread:', spread))
+
+        return distance, spread
+
+    def check_method(self, method):
+        """
+        Raises a :class:`ValueError` if ``method`` is not known by :meth:`combine` .
+
+        :param str method:
+            See :meth:`read_burst` .
+        """
+
+        if method not in ('median', 'trimmed_mean'):
+            raise ValueError('{} {}'.format('unknown method:', method))
+
     def cancel(self):
         """
         Cancel the started callback function.
@@ -206,13 +437,20 @@ class para_standard_servo:
     :param int max_degree:
         Max degree which the servo is able to move.
         **Default:** +90, taken from stand_data_sheet_ .       
+    :param int,float speed:
+        Speed of the servo in degree per second, used by :meth:`travel_time` .
+        **Default:** 315, taken from stand_data_sheet_ (0.19 s per 60 degree at 6 V).
+    :param int,float settle_time:
+        Time in seconds the servo needs to settle after reaching a position, 
+        used by :meth:`travel_time` .
+        **Default:** 0.2.
 
     .. _elinux.org: https://elinux.org/RPi_Low-level_peripherals#Model_A.2B.2C_B.2B_and_B2
     .. _stand_data_sheet: https://www.parallax.com/sites/default/files/downloads/900-00005-Standard-Servo-Product-Documentation-v2.2.pdf
     .. _set_servo_pulsewidth: http://abyz.me.uk/rpi/pigpio/python.html#set_servo_pulsewidth
     """
 
-    def __init__(self, pi, gpio, min_pw = 1000, max_pw = 2000, min_degree = -90, max_degree = 90):
+    def __init__(self, pi, gpio, min_pw = 1000, max_pw = 2000, min_degree = -90, max_degree = 90, speed = 315, settle_time = 0.2):
 
         self.pi = pi
         self.gpio = gpio
@@ -220,6 +458,10 @@ class para_standard_servo:
         self.max_pw = max_pw
         self.min_degree = min_degree
         self.max_degree = max_degree
+        self.speed = speed
+        self.settle_time = settle_time
+        #last set position in degree, None as long as it is unknown
+        self.position = None
         #calculate slope for calculating the pulse width
         self.slope = (self.min_pw - ((self.min_pw + self.max_pw)/2)) / self.max_degree
         #calculate y-offset for calculating the pulse width
@@ -249,6 +491,8 @@ class para_standard_servo:
         pulse_width = max(min(self.max_pw, pulse_width), self.min_degree)
 
         self.pi.set_servo_pulsewidth(user_gpio = self.gpio, pulsewidth = pulse_width)
+        #store the position belonging to the pulsewidth
+        self.position = (pulse_width - self.offset) / self.slope
         
     def calc_pw(self, degree):
 
@@ -272,6 +516,32 @@ class para_standard_servo:
 
         calculated_pw = self.calc_pw(degree = degree)
         self.set_pw(pulse_width = calculated_pw)
+        #store the requested position, calculating it back out of the pulsewidth
+        #is not exact, e.g. -90.00000000000001 instead of -90
+        self.position = degree
+
+    def travel_time(self, degree):
+        """
+        Returns the time the servo needs to reach a position.
+
+        The time is calculated out of the angular distance between the last 
+        set position and ``degree`` with ``speed`` , plus ``settle_time`` .
+        If the last position is unknown, the time for moving from ``min_degree`` 
+        to ``max_degree`` is returned.
+
+        :param int,float degree:
+            Position in degree, which is limited to ``min_degree`` and ``max_degree``.
+        :return: Time in seconds.
+        :rtype: float
+        """
+
+        degree = max(min(self.max_degree, degree), self.min_degree)
+        if self.position is None:
+            distance = self.max_degree - self.min_degree
+        else:
+            distance = abs(degree - self.position)
+
+        return distance / self.speed + self.settle_time
 
     def middle_position(self):
         """
@@ -335,6 +605,18 @@ class scanner:
     :param int,float added_buffer:
         The added safety buffer for waiting for the distance measurement.
         **Default:** 2, so 100% safety buffer.
+    :param int max_retries:
+        Max number of repeated measurements at one position, if no valid echo 
+        is received, see :meth:`hcsr04.read` .
+        **Default:** 3.
+    :param int burst:
+        Number of measurements at each position, combined by :meth:`hcsr04.read_burst` .
+        The spread of the measurements of the last :meth:`read_all_angles` is stored
+        in the :class:`dict` ``spreads`` .
+        **Default:** 1, so one measurement with :meth:`hcsr04.read` .
+    :param str burst_method:
+        How the measurements are combined, see :meth:`hcsr04.read_burst` .
+        **Default:** ``'median'`` .
     :param int gpio:
         GPIO identified by their Broadcom number, see elinux.org_ .
         To this GPIO the signal wire of the servo has to be connected.
@@ -353,30 +635,65 @@ class scanner:
     :param list angles:
         List of positions where the servo moves to and the ultrasonic sensor will 
         make measurements.
+    :param bool serpentine:
+        If True, the direction of the sweep over ``angles`` alternates between 
+        calls of :meth:`read_all_angles` , see there.
+        **Default:** True.
+    :param int,float servo_speed:
+        Speed of the servo in degree per second, see :class:`para_standard_servo` .
+        Can be measured with :meth:`calibrate_servo` .
+        **Default:** 315, taken from stand_data_sheet_ .
+    :param int,float servo_settle_time:
+        Time in seconds the servo needs to settle after reaching a position, 
+        see :class:`para_standard_servo` . Can be measured with :meth:`calibrate_servo` .
+        **Default:** 0.2.
     :param int,float time_servo_reach_position:
-        Time in seconds to wait until the servo moves from one to another position. 
-        This needs to be tested for each servo.
-        **Default:** 3, this should be sufficient to safely (incl. lot of safety 
-        buffer) reach each position before the measurement is made. If the servo 
-        is not oscillating after reaching each position, even a value of 0.35 was 
-        working fine with the demo implementation.
+        Fixed time in seconds to wait until the servo moves from one to another position. 
+        This needs to be tested for each servo. A value of 3 should be sufficient 
+        to safely (incl. lot of safety buffer) reach each position before the 
+        measurement is made.
+        **Default:** None, so the time is calculated out of the angular distance
+        to the next position, ``servo_speed`` and ``servo_settle_time`` .
     :param bool debug:
         Controls if debugging printouts and measurements are made or not. For more 
         details, have a look at the source code. 
         **Default:** False, so no printouts and measurements are made.
+    :param lib_calibration.calibration_store calibration:
+        If set, the values ``min_pw_scanner`` , ``max_pw_scanner`` , ``servo_speed_scanner``
+        and ``servo_settle_time_scanner`` stored for the robot are loaded and replace 
+        ``min_pw`` , ``max_pw`` , ``servo_speed`` and ``servo_settle_time`` , see 
+        :class:`lib_calibration.calibration_store` .
+        **Default:** None, so the passed values are used.
+    :param str robot_id:
+        Id of the robot in ``calibration`` . **Default:** None, so the hostname.
+    :param int,float max_calibration_age:
+        Max age in seconds of the values in ``calibration`` , older values are not used.
+        **Default:** None, so the values are used regardless of their age.
         
     .. _elinux.org: https://elinux.org/RPi_Low-level_peripherals#Model_A.2B.2C_B.2B_and_B2
     .. _`HC-SR04`: https://cdn.sparkfun.com/assets/b/3/0/b/a/DGCH-RED_datasheet.pdf
     .. _set_servo_pulsewidth: http://abyz.me.uk/rpi/pigpio/python.html#set_servo_pulsewidth
+    .. _stand_data_sheet: https://www.parallax.com/sites/default/files/downloads/900-00005-Standard-Servo-Product-Documentation-v2.2.pdf
     """
         
     #default values which are used for the demo implementation
     def __init__(
         self, pi, trigger = 6, echo = 5, pulse_len = 15,
-        temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2,
+        temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, max_retries = 3,
+        burst = 1, burst_method = 'median',
         gpio = 22, min_pw = 1000, max_pw = 2000, min_degree = -90, max_degree = 90,
         angles = [-90, -45, 0, 45, 90],
-        time_servo_reach_position = 3, debug = False):
+        serpentine = True, servo_speed = 315, servo_settle_time = 0.2,
+        time_servo_reach_position = None, debug = False,
+        calibration = None, robot_id = None, max_calibration_age = None):
+
+        #stored calibration values replace the passed ones
+        if calibration is not None:
+            stored = calibration.load(robot_id = robot_id, max_age = max_calibration_age)
+            min_pw = stored.get('min_pw_scanner', min_pw)
+            max_pw = stored.get('max_pw_scanner', max_pw)
+            servo_speed = stored.get('servo_speed_scanner', servo_speed)
+            servo_settle_time = stored.get('servo_settle_time_scanner', servo_settle_time)
 
         #create one pigpio.pi() instance for the sensor and servo
         self.pi = pi
@@ -384,50 +701,321 @@ class scanner:
         self.upper_limit = upper_limit
         self.number_of_sonic_bursts = number_of_sonic_bursts
         self.added_buffer = added_buffer
+        self.max_retries = max_retries
+        self.burst = burst
+        self.burst_method = burst_method
+        self.spreads = dict()
         self.angles = angles
+        self.serpentine = serpentine
+        #direction of the next sweep
+        self.sweep_forward = True
         self.time_servo_reach_position = time_servo_reach_position
         self.debug = debug
 
         #initialize sonar and servo instance
         self.sonar = hcsr04(pi = self.pi, trigger = trigger, echo = echo, pulse_len = pulse_len)
-        self.servo = para_standard_servo(pi = self.pi, gpio = gpio, min_pw = min_pw, max_pw = max_pw, min_degree = min_degree, max_degree = max_degree)
+        self.servo = para_standard_servo(pi = self.pi, gpio = gpio, min_pw = min_pw, max_pw = max_pw, min_degree = min_degree, max_degree = max_degree, speed = servo_speed, settle_time = servo_settle_time)
 
         #buffer time for initializing everything
         time.sleep(1)
 
+    def move_servo(self, degree):
+        """
+        Moves the servo to a position and waits until it is reached.
+
+        If ``time_servo_reach_position`` is None, the waiting time is calculated 
+        with :meth:`para_standard_servo.travel_time` , otherwise 
+        ``time_servo_reach_position`` is waited. If the servo is already at the 
+        position, nothing is waited.
+
+        :param int,float degree:
+            Position in degree, see :meth:`para_standard_servo.set_position` .
+        """
+
+        wait = self.reach_time(degree = degree)
+        self.servo.set_position(degree = degree)
+        #wait for servo reaching the position
+        time.sleep(wait)
+
+    def reach_time(self, degree):
+        """
+        Returns the time to wait until the servo reached a position, see :meth:`move_servo` .
+
+        :param int,float degree:
+            Position in degree.
+        :return: Time in seconds.
+        :rtype: float
+        """
+
+        degree = max(min(self.servo.max_degree, degree), self.servo.min_degree)
+        if self.servo.position is not None and math.isclose(self.servo.position, degree, abs_tol = 1e-6):
+            #already there, e.g. at the end of the previous sweep
+            return 0
+
+        if self.time_servo_reach_position is None:
+            return self.servo.travel_time(degree = degree)
+
+        return self.time_servo_reach_position
+
+    def calibrate_servo(self, steps = (45, 180), tolerance = 0.02, stable_readings = 3, timeout = 3, repetitions = 3, calibration = None, robot_id = None):
+        """
+        Measures ``servo_speed`` and ``servo_settle_time`` of the servo.
+
+        This method moves the servo from ``min_degree`` by each angle of ``steps`` 
+        and measures with the ultrasonic sensor how long it takes until the 
+        measured distance does not change anymore, so until ``stable_readings`` 
+        measurements in a row are within ``tolerance`` . Measurements are only 
+        counted after the distance differs by more than ``tolerance`` from the 
+        distance measured at the start position, so that the servo has left it. Out of the times of the 
+        two steps, the speed and the settle time of the servo are calculated 
+        and set. For this to work, the distances to the objects at the start and 
+        end position of each step must differ by clearly more than ``tolerance`` ,
+        e.g. by placing the robot close to a wall at one side.
+
+        :param tuple steps:
+            Two angles in degree the servo moves for measuring.
+            **Default:** (45, 180).
+        :param float tolerance:
+            Max difference in meters of measurements which are treated as equal.
+            **Default:** 0.02.
+        :param int stable_readings:
+            Number of measurements in a row within ``tolerance`` , after which 
+            the servo is treated as settled.
+            **Default:** 3.
+        :param int,float timeout:
+            Max time in seconds one step may take and time to wait before each step.
+            **Default:** 3.
+        :param int repetitions:
+            Number of measurements of each step, the mean time is used.
+            **Default:** 3.
+        :param lib_calibration.calibration_store calibration:
+            If set, the values are saved as ``servo_speed_scanner`` and 
+            ``servo_settle_time_scanner`` , so that they are loaded by 
+            :class:`scanner` the next time, see :class:`lib_calibration.calibration_store` .
+            **Default:** None, so the values are not saved.
+        :param str robot_id:
+            Id of the robot in ``calibration`` . **Default:** None, so the hostname.
+        :return: Measured values, with the names of ``calibration`` .
+        :rtype: dict
+        """
+
+        min_degree = self.servo.min_degree
+        times = []
+
+        for step in steps:
+
+            step_times = []
+            for i in range(repetitions):
+
+                self.servo.set_position(degree = min_degree)
+                time.sleep(timeout)
+                #distance at the start position, the servo has left it as soon as
+                #the measured distance differs clearly
+                start_distance = self.sonar.read(temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, max_retries = self.max_retries)
+                if start_distance is None:
+                    raise ValueError('{} {}'.format('no valid echo at the start position', min_degree))
+                self.servo.set_position(degree = min_degree + step)
+                start_time = time.monotonic()
+                readings = []
+
+                while time.monotonic() - start_time < timeout:
+
+                    distance = self.sonar.read(temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, max_retries = self.max_retries)
+                    if distance is None:
+                        continue
+                    #measurements before the servo left the start position are not counted,
+                    #otherwise they would already be stable
+                    if not readings and abs(distance - start_distance) <= tolerance:
+                        continue
+                    #time of the trigger signal of this measurement
+                    readings.append((self.sonar.trigger_time - start_time, distance))
+                    last = [d for t, d in readings[-stable_readings:]]
+                    if len(last) == stable_readings and max(last) - min(last) <= tolerance:
+                        #settled at the first of the stable measurements
+                        step_times.append(readings[-stable_readings][0])
+                        break
+                else:
+                    raise ValueError('{} {} {}'.format('no stable measurements within timeout for step', step, 'degree'))
+
+            times.append(sum(step_times) / len(step_times))
+            if self.debug:
+                print('{} {} {} {}'.format('step in degree:', step, 'time in s:', times[-1]))
+
+        if times[1] <= times[0]:
+            raise ValueError('{} {}'.format('bigger step was not slower, times:', times))
+
+        speed = (steps[1] - steps[0]) / (times[1] - times[0])
+        settle_time = max(times[0] - steps[0] / speed, 0)
+
+        self.servo.speed = speed
+        self.servo.settle_time = settle_time
+        results = {'servo_speed_scanner': speed, 'servo_settle_time_scanner': settle_time}
+        print('{} {} {} {}'.format('servo_speed_scanner:', speed, 'servo_settle_time_scanner:', settle_time))
+
+        if calibration is not None:
+            calibration.save(results, robot_id = robot_id)
+
+        return results
+
+    def round_angles(self):
+        """
+        Returns the positions of the next round over ``angles`` , see :meth:`stream` .
+
+        :return: :class:`list` of positions in the order of this round and True, 
+            if the servo has to return to the middle position first.
+        :rtype: tuple
+        """
+
+        if self.serpentine:
+            #continue from the end of the previous sweep in the other direction
+            angles = self.angles if self.sweep_forward else self.angles[::-1]
+            self.sweep_forward = not self.sweep_forward
+            return angles, False
+
+        #return servo to middle position, to not have to move e.g. from
+        #last 90 degree to new -90 degree in the following for loop
+        return self.angles, True
+
+    def stream(self, rounds = 1):
+        """
+        Moves servo and yields the measurement at every defined position as soon as it is made.
+
+        This generator moves the servo to every position defined in :class:`list` 
+        ``angles`` and yields each measurement right after it is made, so that 
+        it can be processed while the servo moves on to the next position.
+
+        If ``serpentine`` is True, the positions are passed in the order of 
+        ``angles`` and in the reversed order in the next round, so back-to-back 
+        rounds do not need to move the servo back. Otherwise the servo returns to
+        the middle position before the positions are passed in the order of ``angles`` .
+
+        :param int rounds:
+            Number of rounds over all positions.
+            **Default:** 1, None for scanning until the generator is closed.
+        :return: Measurements as :class:`tuple` of angle in degree, distance in meters 
+            (None if no valid echo was received) and time of the (last) trigger 
+            signal (:func:`time.monotonic` ).
+        :rtype: generator
+        """
+
+        done = 0
+        while rounds is None or done < rounds:
+
+            if self.debug:
+                start_time = time.time()
+            angles, reset = self.round_angles()
+            if reset:
+                self.move_servo(degree = 0)
+
+            for ang in angles:
+
+                self.move_servo(degree = ang)
+                if self.burst > 1:
+                    distance, self.spreads[ang] = self.sonar.read_burst(n = self.burst, method = self.burst_method, temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, max_retries = self.max_retries, debug = self.debug)
+                else:
+                    distance = self.sonar.read(temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, max_retries = self.max_retries, debug = self.debug)
+                yield ang, distance, self.sonar.trigger_time
+
+            if self.debug:
+                stop_time = time.time() - start_time
+                print('{} {}'.format('time needed for one measurement round:', stop_time))
+
+            done += 1
+
     def read_all_angles(self):
         """
         Moves servo and makes measurements at every defined position.
 
         This method moves the servo to every position defined in :class:`list` 
         ``angles`` , makes a measurement there and afterwards returns a 
-        :class:`dict` with the distance in meter for every position.
+        :class:`dict` with the distance in meter for every position. It collects 
+        one round of :meth:`stream` , see there for the order of the positions.
 
-        :return: Measured distances in meters for each position defined in ``angles``.
+        :return: Measured distances in meters for each position defined in ``angles``,
+            None for a position where no valid echo was received.
         :rtype: dict
         """
 
-        measurement_dict = dict()
-        if self.debug:
-            start_time = time.time()
-        #return servo to middle position, to not have to move e.g. from
-        #last 90 degree to new -90 degree in the following for loop
-        self.servo.middle_position()
-        #wait for servo reaching the position
-        time.sleep(self.time_servo_reach_position)
+        measurement_dict = {ang: distance for ang, distance, timestamp in self.stream()}
 
-        for ang in self.angles:
+        #same order as angles, regardless of the sweep direction
+        return {ang: measurement_dict[ang] for ang in self.angles}
 
-            self.servo.set_position(degree = ang)
-            #wait for servo reaching the position
-            time.sleep(self.time_servo_reach_position)
-            measurement_dict[ang] = self.sonar.read(temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, debug = self.debug)
-        
-        if self.debug:
-            stop_time = time.time() - start_time
-            print('{} {}'.format('time needed for one measurement round:', stop_time))
+    def sweep(self, start = None, end = None, speed = None):
+        """
+        Moves the servo continuously and makes measurements while it is moving.
+
+        This method moves the servo from ``start`` to ``end`` without stopping and 
+        triggers measurements as fast as the ``measurement_cycle`` of the 
+        :class:`hcsr04` allows. Each measurement is tagged with the angle of the 
+        servo at the time of its trigger signal, calculated out of a motion model:
+        the servo moves with ``speed`` from ``start`` to ``end`` . If ``speed`` is 
+        lower than the speed of the servo, the position is set step by step 
+        before each measurement, otherwise ``end`` is set once and the servo moves
+        with its own speed, see ``servo_speed`` . Compared to :meth:`read_all_angles`
+        this results in much more measurements per time, at angles which are not 
+        defined in advance.
+
+        :param int,float start:
+            Start position in degree. The servo is moved there first.
+            **Default:** None, so ``min_degree`` , or ``max_degree`` every other 
+            call if ``serpentine`` is True.
+        :param int,float end:
+            End position in degree.
+            **Default:** None, so the other end of the range of the servo.
+        :param int,float speed:
+            Speed in degree per second.
+            **Default:** None, so the speed of the servo.
+        :return: Measurements as :class:`tuple` of angle in degree, distance in meters 
+            (None if no valid echo was received) and time of the trigger signal
+            (:func:`time.monotonic` ).
+        :rtype: list
+        """
 
-        return measurement_dict
+        if start is None:
+            start = self.servo.min_degree
+            if self.serpentine and not self.sweep_forward:
+                start = self.servo.max_degree
+            if self.serpentine:
+                self.sweep_forward = not self.sweep_forward
+        if end is None:
+            end = self.servo.max_degree if start < 0 else self.servo.min_degree
+        if speed is None or speed >= self.servo.speed:
+            speed = self.servo.speed
+            #the servo moves with its own speed
+            ramp = False
+        else:
+            ramp = True
+
+        self.move_servo(degree = start)
+        direction = 1 if end >= start else -1
+        duration = abs(end - start) / speed
+        measurements = []
+
+        start_time = time.monotonic()
+        self.servo.set_position(degree = start if ramp else end)
+
+        while True:
+
+            if ramp:
+                #set the position of the model at the time of the next trigger signal,
+                #which is delayed by the measurement cycle of the previous one
+                trigger_time = time.monotonic()
+                if self.sonar.trigger_time is not None:
+                    trigger_time = max(trigger_time, self.sonar.trigger_time + self.sonar.measurement_cycle)
+                elapsed = min(trigger_time - start_time, duration)
+                self.servo.set_position(degree = start + direction * speed * elapsed)
+            distance = self.sonar.read(temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, max_retries = self.max_retries, debug = self.debug)
+            #angle of the motion model at the time of the trigger signal
+            elapsed = min(self.sonar.trigger_time - start_time, duration)
+            measurements.append((start + direction * speed * elapsed, distance, self.sonar.trigger_time))
+            if elapsed >= duration:
+                break
+
+        #the servo stays at the end position
+        self.servo.position = end
+
+        return measurements
 
     def cancel(self):
         """
@@ -442,6 +1030,147 @@ class scanner:
 
         self.sonar.cancel()
 
+class multi_scanner:
+    """
+    Makes measurements with several :class:`hcsr04` sensors without crosstalk.
+
+    This class makes measurements with several `HC-SR04`_ sensors, e.g. mounted at 
+    the front, the sides and the rear of the robot, each one connected to its own 
+    trigger and echo GPIO. Sensors whose sound cones overlap, passed as ``conflicts`` , 
+    would receive the echoes of each other, so they are never triggered at the 
+    same time: the sensors are split into slots of sensors which do not conflict 
+    with each other. The sensors of one slot are triggered in parallel, then the 
+    echoes of all of them are awaited and the next slot follows. A sensor is 
+    additionally only triggered after the ``measurement_cycle`` of every 
+    conflicting sensor is over, so that their late echoes have faded away.
+
+    :param pigpio.pi pi: 
+        Instance of a pigpio.pi() object.
+    :param dict sensors:
+        Names of the sensors and :class:`tuple` of their trigger and echo GPIO, 
+        e.g. ``{'front': (6, 5), 'rear': (13, 19)}`` .
+    :param list conflicts:
+        Groups (e.g. :class:`tuple` ) of names of sensors which conflict with 
+        each other.
+        **Default:** None, so all sensors conflict with each other and are 
+        triggered one after another.
+    :param int,float pulse_len:
+        See :class:`hcsr04` . **Default:** 15.
+    :param int,float measurement_cycle:
+        See :class:`hcsr04` . **Default:** 0.06.
+    :param int,float temp_air: 
+        See :meth:`hcsr04.read` . **Default:** 20.
+    :param int,float upper_limit: 
+        See :meth:`hcsr04.read` . **Default:** 4.
+    :param int number_of_sonic_bursts:
+        See :meth:`hcsr04.read` . **Default:** 8.
+    :param int,float added_buffer:
+        See :meth:`hcsr04.read` . **Default:** 2.
+    :param bool debug:
+        Controls if debugging printouts are made or not.
+        **Default:** False, so no printouts are made.
+
+    .. _`HC-SR04`: https://cdn.sparkfun.com/assets/b/3/0/b/a/DGCH-RED_datasheet.pdf
+    """
+
+    def __init__(
+        self, pi, sensors, conflicts = None, pulse_len = 15, measurement_cycle = 0.06,
+        temp_air = 20, upper_limit = 4, number_of_sonic_bursts = 8, added_buffer = 2, debug = False):
+
+        self.pi = pi
+        self.temp_air = temp_air
+        self.upper_limit = upper_limit
+        self.number_of_sonic_bursts = number_of_sonic_bursts
+        self.added_buffer = added_buffer
+        self.debug = debug
+
+        self.sonars = dict()
+        for name, (trigger, echo) in sensors.items():
+            self.sonars[name] = hcsr04(pi = self.pi, trigger = trigger, echo = echo, pulse_len = pulse_len, measurement_cycle = measurement_cycle)
+
+        #conflicting sensors of each sensor
+        self.conflicts = {name: set() for name in self.sonars}
+        if conflicts is None:
+            conflicts = [tuple(self.sonars)]
+        for group in conflicts:
+            for name in group:
+                if name not in self.sonars:
+                    raise ValueError('{} {}'.format('unknown sensor in conflicts:', name))
+                self.conflicts[name].update(other for other in group if other != name)
+
+        #assign each sensor to the first slot without a conflicting sensor
+        self.slots = []
+        for name in self.sonars:
+            for slot in self.slots:
+                if not self.conflicts[name] & set(slot):
+                    slot.append(name)
+                    break
+            else:
+                self.slots.append([name])
+
+        if self.debug:
+            print('{} {}'.format('slots:', self.slots))
+
+    def stream(self, rounds = 1):
+        """
+        Makes measurements with all sensors and yields each one as soon as it is made.
+
+        :param int rounds:
+            Number of rounds over all sensors.
+            **Default:** 1, None for measuring until the generator is closed.
+        :return: Measurements as :class:`tuple` of name of the sensor, distance 
+            in meters (None if no valid echo was received) and time of the trigger 
+            signal (:func:`time.monotonic` ).
+        :rtype: generator
+        """
+
+        done = 0
+        while rounds is None or done < rounds:
+
+            for slot in self.slots:
+
+                #wait until the late echoes of all conflicting sensors have faded away
+                ready_time = time.monotonic()
+                for name in slot:
+                    for other in self.conflicts[name]:
+                        sonar = self.sonars[other]
+                        if sonar.trigger_time is not None:
+                            ready_time = max(ready_time, sonar.trigger_time + sonar.measurement_cycle)
+                remaining_time = ready_time - time.monotonic()
+                if remaining_time > 0:
+                    time.sleep(remaining_time)
+
+                for name in slot:
+                    self.sonars[name].rejected_edges = 0
+                    self.sonars[name].trig()
+
+                for name in slot:
+                    sonar = self.sonars[name]
+                    distance = sonar.read_echo(temp_air = self.temp_air, upper_limit = self.upper_limit, number_of_sonic_bursts = self.number_of_sonic_bursts, added_buffer = self.added_buffer, debug = self.debug)
+                    yield name, distance, sonar.trigger_time
+
+            done += 1
+
+    def read_all(self):
+        """
+        Makes one measurement with each sensor.
+
+        :return: Names of the sensors and :class:`tuple` of the measured distance 
+            in meters (None if no valid echo was received) and the time of the 
+            trigger signal (:func:`time.monotonic` ).
+        :rtype: dict
+        """
+
+        return {name: (distance, timestamp) for name, distance, timestamp in self.stream()}
+
+    def cancel(self):
+        """
+        Cancel the started callback functions of all sensors, see :meth:`hcsr04.cancel` .
+        """
+
+        for sonar in self.sonars.values():
+            sonar.cancel()
+
 if __name__ == '__main__':
 
     #just continue
@@ -0,0 +1,732 @@
+import heapq
+import math
+import random
+import threading
+import time
+
+import pigpio
+
+#https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
+#https://cdn.sparkfun.com/assets/b/3/0/b/a/DGCH-RED_datasheet.pdf
+#http://abyz.me.uk/rpi/pigpio/python.html
+
+class virtual_clock:
+    """
+    Simulated time base for running the modules without a Raspberry Pi.
+
+    This class holds the simulated time and a queue of scheduled events (e.g. the
+    edges of a feedback signal). While it is installed, :func:`time.sleep` does not
+    block anymore but advances the simulated time and fires all events which are
+    due in the meantime. :func:`time.time`, :func:`time.monotonic` and
+    :func:`time.perf_counter` (incl. their ``_ns`` variants) return the simulated
+    time. Therefore the control and measurement loops of :ref:`lib_motion` ,
+    :ref:`lib_scanner` and :ref:`lib_para_360_servo` run unmodified, but a few
+    seconds of robot time pass in milliseconds.
+
+    Waiting with a timeout on a :class:`threading.Event` created while the clock is
+    installed also advances the simulated time, until the event is set by a
+    simulated device or the timeout is reached. Meanwhile other threads which
+    sleep, e.g. the control loop started with :meth:`lib_motion.control.start_move` ,
+    are woken up by the waiting thread at their simulated wake up time and run
+    until they sleep again, before the simulated time advances further.
+
+    The clock can be used as context manager, which installs it on entering and
+    restores the original functions of the :mod:`time` module on exiting.
+
+    .. note::
+        The simulated time is only deterministic if one thread is sleeping at a time.
+        To wait for a thread which sleeps, e.g. a movement in the background, wait
+        with a timeout, e.g. with :meth:`lib_motion.motion_handle.wait` , instead of sleeping.
+
+    :param int,float start_time:
+        Simulated wall clock time in seconds, returned by :func:`time.time`
+        at the beginning of the simulation. Big values reduce the resolution of
+        :func:`time.time` , because it is a float.
+        **Default:** 0.
+    :param bool count_compute:
+        If True, the real time spent between two calls of :func:`time.sleep` is
+        added to the simulated time. This makes the runtime of the executed code
+        visible, e.g. to check if a control loop keeps its sampling time.
+        **Default:** False, so the code runs in zero simulated time.
+    :param float sleep_latency:
+        Time in seconds each call of :func:`time.sleep` oversleeps, as the scheduler
+        of a real operating system does.
+        **Default:** 0.0001.
+    """
+
+    def __init__(self, start_time = 0, count_compute = False, sleep_latency = 0.0001):
+
+        self.start_time = start_time
+        self.count_compute = count_compute
+        self.sleep_latency = sleep_latency
+        self.now = 0.0
+        self._events = []
+        self._sequence = 0
+        self._lock = threading.RLock()
+        #notified if a sleeping thread was woken up or sleeps again, see wait()
+        self._condition = threading.Condition(self._lock)
+        #threads advancing the simulated time in wait() and sleeping threads
+        #woken up by them, which did not sleep again yet
+        self._waiting_threads = set()
+        self._woken_threads = set()
+        self._installed = None
+        #original functions of the time module, also needed for count_compute
+        self._real_perf_counter = time.perf_counter
+        self._last_real = None
+
+    def schedule(self, when, func, *args):
+        """
+        Schedules a function call at a simulated point in time.
+
+        :param float when:
+            Simulated time in seconds (see :meth:`monotonic`) at which ``func`` is called.
+        :param func:
+            Function which will be called with ``args`` .
+        """
+
+        with self._lock:
+            #the sequence number keeps events with the same time in scheduled order
+            heapq.heappush(self._events, (when, self._sequence, func, args))
+            self._sequence += 1
+
+    def advance_to(self, when):
+        """
+        Advances the simulated time and fires all events which are due until then.
+
+        :param float when:
+            Simulated time in seconds to advance to.
+        """
+
+        with self._lock:
+            while self._events and self._events[0][0] <= when:
+                event_time, _, func, args = heapq.heappop(self._events)
+                self.now = max(self.now, event_time)
+                func(*args)
+            self.now = max(self.now, when)
+
+    def wait(self, is_set, timeout, handover_timeout = 1):
+        """
+        Advances the simulated time until ``is_set`` returns True or ``timeout`` passed.
+
+        The events are fired one by one. The lock of the clock is released between 
+        them, so that threads woken up by an event can run until they sleep again 
+        or ``is_set`` returns True, before the next event is fired.
+
+        :param is_set:
+            Function without arguments, which is checked after each fired event.
+        :param float timeout:
+            Max simulated time in seconds to wait.
+        :param float handover_timeout:
+            Max real time in seconds a woken up thread may run without sleeping 
+            again, e.g. because it ended, before the simulated time advances anyway.
+            **Default:** 1.
+        :return: Last return value of ``is_set`` .
+        :rtype: bool
+        """
+
+        self._account_compute()
+        deadline = self.now + timeout
+        thread = threading.current_thread()
+        with self._condition:
+            self._waiting_threads.add(thread)
+        try:
+            while True:
+                with self._condition:
+                    #the condition uses the real time of the threading module
+                    if not self._condition.wait_for(lambda: not self._woken_threads or is_set(), timeout = handover_timeout):
+                        self._woken_threads.clear()
+                    if is_set():
+                        break
+                    if not self._events or self._events[0][0] > deadline:
+                        self.advance_to(deadline + self.sleep_latency)
+                        break
+                    self.advance_to(self._events[0][0])
+        finally:
+            with self._condition:
+                self._waiting_threads.discard(thread)
+                self._condition.notify_all()
+        if self.count_compute:
+            self._last_real = self._real_perf_counter()
+
+        return is_set()
+
+    def _wake(self, thread, woken):
+
+        woken.append(True)
+        self._woken_threads.add(thread)
+        self._condition.notify_all()
+
+    def _account_compute(self):
+
+        #add real time spent since the last sleep to the simulated time
+        if self.count_compute:
+            real = self._real_perf_counter()
+            if self._last_real is not None:
+                self.advance_to(self.now + real - self._last_real)
+            self._last_real = real
+
+    def sleep(self, secs):
+        """
+        Replacement for :func:`time.sleep` , advances the simulated time by ``secs``
+        plus ``sleep_latency`` .
+        """
+
+        if secs < 0:
+            raise ValueError('sleep length must be non-negative')
+
+        thread = threading.current_thread()
+        with self._condition:
+            self._woken_threads.discard(thread)
+            #another thread advances the simulated time, so it wakes this one up
+            if self._waiting_threads - {thread}:
+                woken = []
+                wake_time = self.now + secs + self.sleep_latency
+                self.schedule(wake_time, self._wake, thread, woken)
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: woken or not self._waiting_threads - {thread})
+                if not woken:
+                    #the other threads stopped waiting, so this one advances the time itself
+                    self.advance_to(wake_time)
+                    self._woken_threads.discard(thread)
+                return
+
+        self._account_compute()
+        self.advance_to(self.now + secs + self.sleep_latency)
+        if self.count_compute:
+            self._last_real = self._real_perf_counter()
+
+    def monotonic(self):
+        """
+        Replacement for :func:`time.monotonic` , returns the simulated time in seconds.
+        """
+
+        self._account_compute()
+
+        return self.now
+
+    def monotonic_ns(self):
+
+        return int(self.monotonic() * 1000000000)
+
+    def time(self):
+        """
+        Replacement for :func:`time.time` , returns ``start_time`` plus the simulated time.
+        """
+
+        return self.start_time + self.monotonic()
+
+    def time_ns(self):
+
+        return int(self.time() * 1000000000)
+
+    def install(self):
+        """
+        Replaces the functions of the :mod:`time` module with the simulated ones.
+        """
+
+        if self._installed is not None:
+            return
+
+        names = ('sleep', 'time', 'time_ns', 'monotonic', 'monotonic_ns', 'perf_counter', 'perf_counter_ns')
+        self._installed = {name: getattr(time, name) for name in names}
+        self._installed_event = threading.Event
+        threading.Event = self._event
+        time.sleep = self.sleep
+        time.time = self.time
+        time.time_ns = self.time_ns
+        time.monotonic = self.monotonic
+        time.monotonic_ns = self.monotonic_ns
+        time.perf_counter = self.monotonic
+        time.perf_counter_ns = self.monotonic_ns
+        self._last_real = self._real_perf_counter()
+
+    def uninstall(self):
+        """
+        Restores the original functions of the :mod:`time` module.
+        """
+
+        if self._installed is None:
+            return
+
+        for name, func in self._installed.items():
+            setattr(time, name, func)
+        threading.Event = self._installed_event
+        self._installed = None
+
+    def _event(self):
+
+        return _virtual_event(clock = self)
+
+    def __enter__(self):
+
+        self.install()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.uninstall()
+
+class _virtual_event(threading.Event):
+
+    #waiting with a timeout advances the simulated time, see virtual_clock.wait()
+    def __init__(self, clock):
+
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout = None):
+
+        if timeout is None:
+            return super().wait()
+
+        return self.clock.wait(is_set = self.is_set, timeout = timeout)
+
+    def set(self):
+
+        super().set()
+        #a thread waiting in virtual_clock.wait() checks the event again
+        with self.clock._condition:
+            self.clock._condition.notify_all()
+
+class _callback:
+
+    #mirrors pigpio._callback, see http://abyz.me.uk/rpi/pigpio/python.html#callback
+    def __init__(self, pi, user_gpio, edge, func):
+
+        self.pi = pi
+        self.gpio = user_gpio
+        self.edge = edge
+        self.count = 0
+        self.func = self._tally if func is None else func
+        self.pi._callbacks.append(self)
+
+    def _tally(self, gpio, level, tick):
+
+        self.count += 1
+
+    def tally(self):
+
+        return self.count
+
+    def reset_tally(self):
+
+        self.count = 0
+
+    def cancel(self):
+
+        if self in self.pi._callbacks:
+            self.pi._callbacks.remove(self)
+
+class pi:
+    """
+    Simulated replacement for a pigpio.pi() object.
+
+    This class implements the part of the pigpio_ API which is used by the modules
+    (``set_mode``, ``set_servo_pulsewidth``, ``callback``, ``gpio_trigger``,
+    ``get_current_tick``, ...). Instead of GPIOs, simulated devices
+    (:class:`feedback_360` , :class:`hcsr04` , :class:`standard_servo` ) are attached
+    to it, which generate the edges the callbacks are called with. The ticks are
+    derived from the simulated time of ``clock`` , including the wrap around
+    after 4294967295 µs.
+
+    :param virtual_clock clock:
+        Simulated time base. **Default:** None, so a new :class:`virtual_clock` is created.
+    :param int tick_offset:
+        Value of the tick at simulated time 0 in microseconds. Can be set close to
+        4294967295 to test the handling of the wrap around.
+        **Default:** 0.
+
+    .. _pigpio: http://abyz.me.uk/rpi/pigpio/python.html
+    """
+
+    def __init__(self, clock = None, tick_offset = 0):
+
+        self.clock = virtual_clock() if clock is None else clock
+        self.tick_offset = tick_offset
+        self.connected = True
+        self._modes = {}
+        self._levels = {}
+        self._pulsewidths = {}
+        self._callbacks = []
+        self._servo_listeners = {}
+        self._trigger_listeners = {}
+
+    def get_current_tick(self):
+
+        return (int(round(self.clock.now * 1000000)) + self.tick_offset) & 0xFFFFFFFF
+
+    def set_mode(self, gpio, mode):
+
+        self._modes[gpio] = mode
+
+        return 0
+
+    def get_mode(self, gpio):
+
+        return self._modes.get(gpio, pigpio.INPUT)
+
+    def read(self, gpio):
+
+        return self._levels.get(gpio, 0)
+
+    def set_servo_pulsewidth(self, user_gpio, pulsewidth):
+
+        #like pigpio, 0 switches the servo pulses off
+        if pulsewidth != 0 and not 500 <= pulsewidth <= 2500:
+            raise ValueError('pulsewidth must be 0 or between 500 and 2500')
+
+        for listener in self._servo_listeners.get(user_gpio, ()):
+            listener(pulsewidth)
+        self._pulsewidths[user_gpio] = pulsewidth
+
+        return 0
+
+    def get_servo_pulsewidth(self, user_gpio):
+
+        return self._pulsewidths.get(user_gpio, 0)
+
+    def gpio_trigger(self, user_gpio, pulse_len = 10, level = 1):
+
+        for listener in self._trigger_listeners.get(user_gpio, ()):
+            listener(pulse_len)
+
+        return 0
+
+    def callback(self, user_gpio, edge = pigpio.RISING_EDGE, func = None):
+
+        return _callback(pi = self, user_gpio = user_gpio, edge = edge, func = func)
+
+    def stop(self):
+
+        self.connected = False
+
+    def add_servo_listener(self, gpio, listener):
+
+        self._servo_listeners.setdefault(gpio, []).append(listener)
+
+    def add_trigger_listener(self, gpio, listener):
+
+        self._trigger_listeners.setdefault(gpio, []).append(listener)
+
+    def set_level(self, gpio, level):
+        """
+        Sets the level of a GPIO and calls the matching callbacks, used by the simulated devices.
+        """
+
+        self._levels[gpio] = level
+        tick = self.get_current_tick()
+        edge = pigpio.RISING_EDGE if level else pigpio.FALLING_EDGE
+        #iterate over a copy, a callback might cancel itself
+        for cb in list(self._callbacks):
+            if cb.gpio == gpio and (cb.edge == pigpio.EITHER_EDGE or cb.edge == edge):
+                cb.func(gpio, level, tick)
+
+class feedback_360:
+    """
+    Simulated Parallax Feedback 360° High-Speed Servo `360_data_sheet`_ .
+
+    The servo rotates with a speed depending on the pulsewidth set on ``gpio``
+    and outputs its angular position as a 910 Hz PWM on ``feedback_gpio`` . The
+    duty cycle changes between ``dc_min`` and ``dc_max`` over one revolution and
+    increases while rotating clockwise (pulsewidth smaller than ``center_pw`` ),
+    matching :class:`lib_para_360_servo.write_pwm` and :class:`lib_motion.control` .
+    The speed follows the set speed with a first order lag.
+
+    :param pi pi:
+        Instance of a :class:`pi` object.
+    :param int gpio:
+        GPIO of the control wire.
+    :param int feedback_gpio:
+        GPIO of the feedback wire.
+    :param int,float angle:
+        Start position in degree. **Default:** 0.
+    :param float dc_min:
+        Min duty cycle of the feedback signal as fraction. **Default:** 0.029, taken from the data sheet.
+    :param float dc_max:
+        Max duty cycle of the feedback signal as fraction. **Default:** 0.971, taken from the data sheet.
+    :param int,float frequency:
+        Frequency of the feedback signal in Hz. **Default:** 910, taken from the data sheet.
+    :param int,float max_speed:
+        Speed in degree/s at full pulsewidth. **Default:** 650, as assumed in :meth:`lib_motion.control.move` .
+    :param int,float center_pw:
+        Pulsewidth in µs at which the servo stands still. **Default:** 1500.
+    :param int,float deadband:
+        Deadband in µs around ``center_pw`` . **Default:** 20, taken from the data sheet.
+    :param int,float pw_range:
+        Difference between ``center_pw`` and the pulsewidth of full speed in µs. **Default:** 220.
+    :param float time_constant:
+        Time constant of the speed response in seconds. **Default:** 0.02.
+    :param int,float jitter:
+        Standard deviation of a noise added to the high time of the feedback signal in µs.
+        **Default:** 0, so no noise.
+    :param int seed:
+        Seed of the random generator used for ``jitter`` . **Default:** None.
+
+    .. _`360_data_sheet`: https://www.parallax.com/sites/default/files/downloads/900-00360-Feedback-360-HS-Servo-v1.1.pdf
+    """
+
+    def __init__(
+        self, pi, gpio, feedback_gpio, angle = 0,
+        dc_min = 0.029, dc_max = 0.971, frequency = 910,
+        max_speed = 650, center_pw = 1500, deadband = 20, pw_range = 220,
+        time_constant = 0.02, jitter = 0, seed = None):
+
+        self.pi = pi
+        self.gpio = gpio
+        self.feedback_gpio = feedback_gpio
+        self.angle = angle % 360
+        self.dc_min = dc_min
+        self.dc_max = dc_max
+        self.period = 1 / frequency
+        self.max_speed = max_speed
+        self.center_pw = center_pw
+        self.deadband = deadband
+        self.pw_range = pw_range
+        self.time_constant = time_constant
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.speed = 0.0
+        self.set_speed = 0.0
+        #total rotation in degree, clockwise positive
+        self.total_angle = 0.0
+        self._last_update = self.pi.clock.now
+
+        self.pi.add_servo_listener(self.gpio, self._on_pulsewidth)
+        self.pi.clock.schedule(self.pi.clock.now, self._period_start)
+
+    def _update(self):
+
+        now = self.pi.clock.now
+        dt = now - self._last_update
+        if dt <= 0:
+            return
+        speed_old = self.speed
+        if self.time_constant > 0:
+            self.speed += (self.set_speed - self.speed) * (1 - math.exp(-dt / self.time_constant))
+        else:
+            self.speed = self.set_speed
+        #trapezoidal integration of the speed
+        delta = (speed_old + self.speed) / 2 * dt
+        self.total_angle += delta
+        self.angle = (self.angle + delta) % 360
+        self._last_update = now
+
+    def _on_pulsewidth(self, pulsewidth):
+
+        self._update()
+        difference = self.center_pw - pulsewidth
+        if pulsewidth == 0 or abs(difference) <= self.deadband:
+            self.set_speed = 0.0
+        else:
+            fraction = (abs(difference) - self.deadband) / (self.pw_range - self.deadband)
+            self.set_speed = math.copysign(min(fraction, 1) * self.max_speed, difference)
+
+    def duty_cycle(self):
+        """
+        Returns the duty cycle of the feedback signal at the current position as fraction.
+        """
+
+        return self.dc_min + (self.dc_max - self.dc_min) * self.angle / 360
+
+    def _period_start(self):
+
+        self._update()
+        high_time = self.period * self.duty_cycle()
+        if self.jitter:
+            high_time += self.random.gauss(0, self.jitter) / 1000000
+            high_time = max(min(high_time, self.period * 0.999), 0.000001)
+        now = self.pi.clock.now
+        self.pi.set_level(self.feedback_gpio, 1)
+        self.pi.clock.schedule(now + high_time, self.pi.set_level, self.feedback_gpio, 0)
+        self.pi.clock.schedule(now + self.period, self._period_start)
+
+class hcsr04:
+    """
+    Simulated `HC-SR04`_ ultrasonic sensor.
+
+    After a trigger pulse on ``trigger`` , the echo pin ``echo`` goes high for the
+    time of flight of the sound to an object in ``distance`` and back. If the
+    object is out of range, the echo pin stays high for ``timeout`` .
+
+    :param pi pi:
+        Instance of a :class:`pi` object.
+    :param int trigger:
+        GPIO of the trigger pin.
+    :param int echo:
+        GPIO of the echo pin.
+    :param distance:
+        Distance to the object in meters, either a number or a function which gets
+        the :class:`pi` object passed and returns the distance (e.g. depending on the
+        position of a :class:`standard_servo` ). None means no object in range.
+        **Default:** 1.
+    :param int,float temp_air:
+        Temperature of the air in degree celsius. **Default:** 20.
+    :param int,float max_range:
+        Max distance in meters which is detected. **Default:** 4, taken from the data sheet.
+    :param float delay:
+        Time in seconds between the trigger pulse and the rising edge of the echo,
+        so the time for sending the sonic bursts. **Default:** 0.0005.
+    :param float timeout:
+        High time of the echo in seconds if no object is detected. **Default:** 0.038.
+    :param int,float noise:
+        Standard deviation of a noise added to the distance in meters. **Default:** 0.
+    :param int seed:
+        Seed of the random generator used for ``noise`` . **Default:** None.
+
+    .. _`HC-SR04`: https://cdn.sparkfun.com/assets/b/3/0/b/a/DGCH-RED_datasheet.pdf
+    """
+
+    def __init__(
+        self, pi, trigger, echo, distance = 1, temp_air = 20, max_range = 4,
+        delay = 0.0005, timeout = 0.038, noise = 0, seed = None):
+
+        self.pi = pi
+        self.trigger = trigger
+        self.echo = echo
+        self.distance = distance
+        self.temp_air = temp_air
+        self.max_range = max_range
+        self.delay = delay
+        self.timeout = timeout
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.busy = False
+        self.number_of_triggers = 0
+
+        self.pi.add_trigger_listener(self.trigger, self._on_trigger)
+
+    def _get_distance(self):
+
+        distance = self.distance(self.pi) if callable(self.distance) else self.distance
+        if distance is not None and self.noise:
+            distance += self.random.gauss(0, self.noise)
+
+        return distance
+
+    def _on_trigger(self, pulse_len):
+
+        self.number_of_triggers += 1
+        #a trigger while measuring is ignored by the sensor
+        if self.busy:
+            return
+        self.busy = True
+        start = self.pi.clock.now + pulse_len / 1000000 + self.delay
+        self.pi.clock.schedule(start, self._echo_start)
+
+    def _echo_start(self):
+
+        distance = self._get_distance()
+        c_air = 331.3 + (0.606 * self.temp_air)
+        if distance is None or distance > self.max_range:
+            high_time = self.timeout
+        else:
+            high_time = max(distance, 0) * 2 / c_air
+        self.pi.set_level(self.echo, 1)
+        self.pi.clock.schedule(self.pi.clock.now + high_time, self._echo_end)
+
+    def _echo_end(self):
+
+        self.pi.set_level(self.echo, 0)
+        self.busy = False
+
+class standard_servo:
+    """
+    Simulated Parallax Standard Servo `stand_data_sheet`_ .
+
+    The servo moves with ``speed`` to the position defined by the pulsewidth set
+    on ``gpio`` . The mapping of the pulsewidth to the position matches
+    :class:`lib_scanner.para_standard_servo` , ``min_pw`` is max right (``max_degree`` ).
+
+    :param pi pi:
+        Instance of a :class:`pi` object.
+    :param int gpio:
+        GPIO of the signal wire.
+    :param int min_pw:
+        Pulsewidth of ``max_degree`` in µs. **Default:** 1000.
+    :param int max_pw:
+        Pulsewidth of ``min_degree`` in µs. **Default:** 2000.
+    :param int min_degree:
+        Min position in degree. **Default:** -90.
+    :param int max_degree:
+        Max position in degree. **Default:** 90.
+    :param int,float speed:
+        Speed in degree/s. **Default:** 300.
+    :param int,float angle:
+        Start position in degree. **Default:** 0.
+
+    .. _stand_data_sheet: https://www.parallax.com/sites/default/files/downloads/900-00005-Standard-Servo-Product-Documentation-v2.2.pdf
+    """
+
+    def __init__(self, pi, gpio, min_pw = 1000, max_pw = 2000, min_degree = -90, max_degree = 90, speed = 300, angle = 0):
+
+        self.pi = pi
+        self.gpio = gpio
+        self.min_pw = min_pw
+        self.max_pw = max_pw
+        self.min_degree = min_degree
+        self.max_degree = max_degree
+        self.speed = speed
+        self._angle = angle
+        self.target = angle
+        self._last_update = self.pi.clock.now
+
+        self.pi.add_servo_listener(self.gpio, self._on_pulsewidth)
+
+    def angle(self):
+        """
+        Returns the current position in degree.
+        """
+
+        now = self.pi.clock.now
+        step = self.speed * (now - self._last_update)
+        difference = self.target - self._angle
+        self._angle = self.target if abs(difference) <= step else self._angle + math.copysign(step, difference)
+        self._last_update = now
+
+        return self._angle
+
+    def _on_pulsewidth(self, pulsewidth):
+
+        self.angle()
+        if pulsewidth == 0:
+            return
+        slope = (self.max_degree - self.min_degree) / (self.min_pw - self.max_pw)
+        target = self.min_degree + slope * (pulsewidth - self.max_pw)
+        self.target = max(min(self.max_degree, target), self.min_degree)
+
+def robot(
+    clock = None, l_wheel_gpio = 16, r_wheel_gpio = 20, servo_l_gpio = 17, servo_r_gpio = 27,
+    trigger = 6, echo = 5, servo_gpio = 22, distance = 1, **kwargs):
+    """
+    Creates a simulated demo implementation.
+
+    Returns a :class:`pi` object with two :class:`feedback_360` wheels, one
+    :class:`hcsr04` and one :class:`standard_servo` attached to the default GPIOs
+    of :class:`lib_motion.control` and :class:`lib_scanner.scanner` . The simulated
+    devices are accessible as attributes ``servo_l`` , ``servo_r`` , ``sonar`` and
+    ``servo`` of the returned object.
+
+    :param virtual_clock clock:
+        Simulated time base. **Default:** None, so a new :class:`virtual_clock` is created.
+    :param distance:
+        Distance to the object in front of the sonar, see :class:`hcsr04` .
+        **Default:** 1.
+    :param kwargs:
+        Passed to both :class:`feedback_360` instances, e.g. ``jitter`` .
+    :return: Simulated pigpio.pi() object.
+    :rtype: pi
+    """
+
+    sim = pi(clock = clock)
+    sim.servo_l = feedback_360(pi = sim, gpio = servo_l_gpio, feedback_gpio = l_wheel_gpio, **kwargs)
+    sim.servo_r = feedback_360(pi = sim, gpio = servo_r_gpio, feedback_gpio = r_wheel_gpio, **kwargs)
+    sim.sonar = hcsr04(pi = sim, trigger = trigger, echo = echo, distance = distance)
+    sim.servo = standard_servo(pi = sim, gpio = servo_gpio)
+
+    return sim
+
+if __name__ == '__main__':
+
+    #just continue
+    pass
@@ -1,10 +1,12 @@
 import pigpio
 
+import lib_calibration
 import lib_motion
 
 pi = pigpio.pi()
 
-robot = lib_motion.control(pi = pi)
+#calibration values saved by calibrate.py are loaded, if available
+robot = lib_motion.control(pi = pi, calibration = lib_calibration.calibration_store())
 
 a = 0
 while a < 4:
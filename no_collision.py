@@ -1,12 +1,14 @@
 import pigpio
 
+import lib_calibration
 import lib_motion
 import lib_scanner
 
 #initialize one pigpio.pi() instance to be used by all lib_*
 pi = pigpio.pi()
 
-robot = lib_motion.control(pi = pi)
+#calibration values saved by calibrate.py are loaded, if available
+robot = lib_motion.control(pi = pi, calibration = lib_calibration.calibration_store())
 
 """
 .. warning::
@@ -22,12 +24,32 @@ ranger = lib_scanner.scanner(pi = pi, min_pw=600, max_pw=2350)
 
 while True:
 
+    #scan all angles before driving, so that the robot never drives towards 
+    #an obstacle which was not measured yet
     distances = ranger.read_all_angles()
-    list_dist = list(distances.values())
-    if any(t<0.4 for t in list_dist):
+
+    #None -> no valid echo, so treated like an obstacle
+    if any(distance is None or distance<0.4 for distance in distances.values()):
         robot.turn(45)
-    else:
-        robot.straight(200)
+        continue
+
+    #drive in the background and scan meanwhile
+    motion = robot.straight_async(200)
+
+    for angle, distance, timestamp in ranger.stream(rounds = None):
+
+        #None -> no valid echo, so treated like an obstacle
+        if distance is None or distance<0.4:
+            motion.cancel()
+            motion.wait()
+            robot.turn(45)
+            break
+
+        if motion.done():
+            break
+
+    #raises an exception of the control loop, if there was one
+    motion.wait()
 
 #http://abyz.me.uk/rpi/pigpio/python.html#callback
 robot.cancel()
@@ -0,0 +1,37 @@
+import time
+
+import lib_motion
+import lib_scanner
+import lib_sim
+
+#create a simulated pigpio.pi() instance with the demo implementation attached,
+#the sonar sees an obstacle 30 cm away on the left side
+pi = lib_sim.robot(distance = lambda pi: 0.3 if pi.servo.angle() < 0 else 2.0)
+
+#while the virtual clock is installed, time.sleep() advances the simulated time
+with pi.clock:
+
+    start_time = time.perf_counter()
+
+    robot = lib_motion.control(pi = pi)
+    robot.straight(200)
+    robot.turn(90)
+
+    ranger = lib_scanner.scanner(pi = pi)
+    distances = ranger.read_all_angles()
+
+    #20 cm backward in the background, waiting with a timeout advances the 
+    #simulated time and lets the control loop run
+    motion = robot.straight_async(-200)
+    finished = motion.wait(timeout = 10)
+
+    simulated_time = time.perf_counter() - start_time
+
+print('{} {}'.format('measured distances:', distances))
+print('{} {}'.format('background movement finished:', finished))
+print('{} {}'.format('simulated time in seconds:', round(simulated_time, 2)))
+print('{} {}'.format('rotation left/right wheel in degree:', [round(pi.servo_l.total_angle), round(pi.servo_r.total_angle)]))
+
+robot.cancel()
+ranger.cancel()
+pi.stop()